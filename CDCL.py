@@ -3,19 +3,14 @@ import sys
 import time
 import os
 
+from dimacs_reader import load_clauses
+
 def parse_dimacs(filename):
     """
     Parse a DIMACs file containing an encoded sudoku, returning clauses:
     clauses: a list of sets, representing different clauses.
     """
-    clauses = []
-    with open(filename, 'r') as f:
-        for line in f:
-            if line.startswith('p') or line.startswith('c') or not line.strip():
-                continue
-            clause = {int(x) for x in line.strip().split()[:-1]}  # Remove trailing 0
-            clauses.append(clause)
-    return clauses
+    return load_clauses(filename)
 
 
 def resolve_clauses(clause1, clause2, literal):
@@ -137,10 +132,54 @@ def decay_activity_scores(activity_scores, decay_factor, verbose=False):
         print(f"Activity scores after decay: {activity_scores}")
 
 
-def CDCL(clauses, VSIDS, verbose=False):
+KERNELS = ('python', 'numpy')
+
+
+def select_kernel(clauses, kernel):
+    """
+    Return the unit propagation function: 'python' (default) or 'numpy' (see numpy_kernel.py).
+    Falls back to the Python version when NumPy is not available.
+    """
+    if kernel not in KERNELS:
+        raise ValueError(f"Unknown kernel: {kernel} (choose from {', '.join(KERNELS)})")
+    if kernel == 'numpy':
+        try:
+            from numpy_kernel import UnitPropagator
+        except ImportError:
+            print("NumPy is not available, using the Python propagation kernel")
+        else:
+            return UnitPropagator(clauses)
+    return unit_propagation
+
+
+def CDCL(clauses, VSIDS, verbose=False, phases=None, kernel='python', checkpoint=None, resume=None):
+    """
+    Run CDCL on a list of clause sets. Decisions assign False, unless phases (a dictionary
+    from variable to truth value, e.g. found by local search) gives a value for the variable.
+    kernel selects the unit propagation implementation, see select_kernel.
+    checkpoint (a checkpoint.Checkpointer) periodically saves the learned state, and resume
+    (a checkpoint.Snapshot of the same formula) continues from a saved state.
+    Returns the assignment (False if unsatisfiable) and the number of conflicts.
+    """
+    if phases is None:
+        phases = {}
+    propagate = select_kernel(clauses, kernel)
+
     # Metrics
     conflicts = 0
 
+    # Learned clause bookkeeping for checkpoints
+    original_clauses = len(clauses)
+    learned_info = {}  # id of a learned clause -> [LBD, activity]
+    saved_phases = {}  # Last value of every variable that was backtracked
+    if checkpoint is not None or resume is not None:
+        from checkpoint import fingerprint
+        formula = fingerprint(clauses)
+        if resume is not None and resume.fingerprint != formula:
+            raise ValueError("The checkpoint was made for a different formula")
+        if checkpoint is not None:
+            checkpoint.start(formula, resume)
+
     # Initialize variables
     decision_levels = {}
     decision_variable_assignments = {}  # Holds assigned truth values for decision variables
@@ -157,7 +196,19 @@ def CDCL(clauses, VSIDS, verbose=False):
         for l in clause:
             activity_scores.setdefault(abs(l), 0)
 
-    conflict = unit_propagation(pa, clauses, decision_levels, antecedents, decision_level, activity_scores, verbose)
+    if resume is not None:
+        for learned_clause, lbd, activity in resume.learned:
+            clauses.append(learned_clause)
+            learned_info[id(learned_clause)] = [lbd, activity]
+        activity_scores.update(resume.activity_scores)
+        saved_phases.update(resume.phases)
+        if not phases:
+            phases = resume.phases
+        conflicts = resume.conflicts
+        if verbose:
+            print(f"Resumed with {len(resume.learned)} learned clauses after {conflicts} conflicts")
+
+    conflict = propagate(pa, clauses, decision_levels, antecedents, decision_level, activity_scores, verbose)
     if conflict:  # Unsatisfiable during initial unit propagation
         if verbose:
             print("Unsatisfiable during initial unit propagation")
@@ -171,19 +222,27 @@ def CDCL(clauses, VSIDS, verbose=False):
             return False, conflicts
         decision_level += 1
 
-        # Assign False by default
-        pa[new_lit] = False
+        # Assign False by default, or the saved phase
+        value = phases.get(new_lit, False)
+        pa[new_lit] = value
         decision_levels[new_lit] = decision_level
-        decision_variable_assignments[new_lit] = False
+        decision_variable_assignments[new_lit] = value
         if verbose:
-            print(f"\nDecision level {decision_level}: Assigning variable {new_lit} to False")
+            print(f"\nDecision level {decision_level}: Assigning variable {new_lit} to {value}")
 
-        conflict_clause = unit_propagation(pa, clauses, decision_levels, antecedents, decision_level, activity_scores, verbose)
+        conflict_clause = propagate(pa, clauses, decision_levels, antecedents, decision_level, activity_scores, verbose)
         while conflict_clause:
             conflicts += 1
+            if id(conflict_clause) in learned_info:
+                learned_info[id(conflict_clause)][1] += 1
             if verbose:
                 print(f"Conflict detected at decision level {decision_level}. Conflict clause: {conflict_clause}")
 
+            if decision_level == 0:  # Conflict without any decisions: unsatisfiable
+                if verbose:
+                    print("Not satisfiable: conflict at decision level 0")
+                return False, conflicts
+
             learned_clause, backtrack_level = conflict_analysis(pa, decision_level, decision_levels, antecedents, conflict_clause, activity_scores, verbose)
             if verbose:
                 print(f"Learned clause: {learned_clause}")
@@ -195,6 +254,7 @@ def CDCL(clauses, VSIDS, verbose=False):
                 return False, conflicts
 
             clauses.append(learned_clause)  # Add the learned clause
+            learned_info[id(learned_clause)] = [len({decision_levels.get(abs(lit), 0) for lit in learned_clause}), 0]
             decay_activity_scores(activity_scores, decay_factor, verbose)
 
             # Backtrack
@@ -202,6 +262,7 @@ def CDCL(clauses, VSIDS, verbose=False):
             # Remove assignments at levels higher than backtrack_level
             vars_to_remove = [var for var in pa if decision_levels.get(var, -1) > backtrack_level]
             for var in vars_to_remove:
+                saved_phases[var] = pa[var]
                 del pa[var]
                 if var in antecedents:
                     del antecedents[var]
@@ -212,7 +273,13 @@ def CDCL(clauses, VSIDS, verbose=False):
                 if verbose:
                     print(f"Backtracked variable {var}")
 
-            conflict_clause = unit_propagation(pa, clauses, decision_levels, antecedents, decision_level, activity_scores, verbose)
+            if checkpoint is not None and checkpoint.due():
+                learned = [(clause, *learned_info[id(clause)]) for clause in clauses[original_clauses:]]
+                checkpoint.save(conflicts, activity_scores, saved_phases, learned)
+                if verbose:
+                    print(f"Checkpoint saved to {checkpoint.path}")
+
+            conflict_clause = propagate(pa, clauses, decision_levels, antecedents, decision_level, activity_scores, verbose)
             if conflict_clause:
                 if verbose:
                     print(f"Conflict detected during unit propagation after backtracking at level {decision_level}. Conflict clause: {conflict_clause}")
@@ -221,11 +288,11 @@ def CDCL(clauses, VSIDS, verbose=False):
     return pa, conflicts
 
 
-def run_CDCL(filename, VSIDS, verbose=False):
+def run_CDCL(filename, VSIDS, verbose=False, kernel='python', checkpoint=None, resume=None):
     clauses = parse_dimacs(filename)
 
     start_time = time.time()
-    pa, conflicts = CDCL(clauses, VSIDS, verbose)
+    pa, conflicts = CDCL(clauses, VSIDS, verbose, kernel=kernel, checkpoint=checkpoint, resume=resume)
     end_time = time.time()
 
     runtime = end_time - start_time
@@ -242,12 +309,13 @@ def run_CDCL(filename, VSIDS, verbose=False):
             print(f"CDCL without VSIDS could not find a solution for: {filename}")
 
     # (optional) Write the solution to an output file
-    base_filename, _ = os.path.splitext(filename)
-    output_filename = base_filename + '.out'
-    with open(output_filename, "w") as f:
-        for literal, value in pa.items():
-            dimacs_literal = str(literal) if value else f"-{literal}"
-            f.write(dimacs_literal + " 0\n")
+    if pa:
+        base_filename, _ = os.path.splitext(filename)
+        output_filename = base_filename + '.out'
+        with open(output_filename, "w") as f:
+            for literal, value in pa.items():
+                dimacs_literal = str(literal) if value else f"-{literal}"
+                f.write(dimacs_literal + " 0\n")
 
     return pa, runtime, conflicts
 
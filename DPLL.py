@@ -3,6 +3,8 @@ import sys
 import time
 import os
 
+from dimacs_reader import load_clauses
+
 sys.setrecursionlimit(10**6)
 
 # Global variables
@@ -17,14 +19,7 @@ def parse_dimacs(filename):
     Parse a DIMACs file containing a sudoku, returning variables:
     clauses: a list of sets, representing different clauses.
     """
-    clauses = []
-    with open(filename, 'r') as f:
-        for line in f:
-            if line.startswith('p') or line.startswith('c') or not line.strip():
-                continue
-            clause = {int(x) for x in line.strip().split()[:-1]}  # Remove trailing 0
-            clauses.append(clause)
-    return clauses
+    return load_clauses(filename)
 
 
 def simplify(pa, clauses, verbose):
@@ -1,43 +1,202 @@
 """""
-Usage: python SAT.py -Sn dimacs_file
+Usage: python SAT.py -Sn dimacs_file [--workers W] [--kernel python|numpy] [--seed S] [--max-flips F] [--max-tries T]
+                                      [--checkpoint file [--checkpoint-interval seconds]] [--resume file]
+       python SAT.py -Sn --sudoku sudoku_file [--cache cache_file]
+       python SAT.py --stats dimacs_file
+       python SAT.py --server
 where:
     n=1: Basic DPLL
     n=2: DPLL + VSIDS heuristic
     n=3: Basic CDCL
     n=4: CDCL + VSIDS heuristic
+    n=5: WalkSAT local search (falls back to CDCL warm-started from the best assignment)
+    n=6: ProbSAT local search (same fallback)
 
-    dimacs_file: A dimacs encoded SAT problem
+    dimacs_file: A dimacs encoded SAT problem, optionally compressed (.gz, .xz, .bz2)
+    sudoku_file: A file with one Sudoku string per line, solved through the solution cache
+    cache_file: SQLite file that keeps the cached solutions between runs
+    --stats: print formula statistics without loading the whole formula
+    --workers W: solve with cube-and-conquer on W worker processes (CDCL, VSIDS for n=2 and n=4)
+    --seed S: random seed for local search
+    --max-flips F, --max-tries T: local search budget before the CDCL fallback, T tries of F
+                                  flips (default 1 try of 20000 flips)
+    --kernel: unit propagation kernel for CDCL (n=3 and n=4), see numpy_kernel.py
+    --checkpoint: periodically save the CDCL state (n=3 and n=4) to file, default every 60 seconds
+    --resume: continue CDCL from a checkpoint file of the same formula
+    --server: keep running and read one command line (the arguments above) per line from
+              stdin, so imports and loaded rules are reused; every command ends with a "Done" line
+
+Only the modules of the selected solver are imported, to keep the start of short runs fast.
 """""
 import sys
 
-import DPLL
-import CDCL
 
+LOCAL_SEARCH = {5: 'walksat', 6: 'probsat'}
+
+
+def local_search_budget(max_flips=None, max_tries=None):
+    """
+    Keyword arguments for the local search functions; the defaults of local_search.py are used for None.
+    """
+    budget = {}
+    if max_flips is not None:
+        budget["max_flips"] = max_flips
+    if max_tries is not None:
+        budget["max_tries"] = max_tries
+    return budget
 
-def run_solver(filename, heuristic):
-    if heuristic == 1: # DPLL
-        runtime, conflicts = DPLL.run_DPLL(filename, False)
-    elif heuristic == 2: # DPLL + VSIDS
-        runtime, conflicts = DPLL.run_DPLL(filename, True)
-    elif heuristic == 3: # CDCL
-        _, runtime, conflicts = CDCL.run_CDCL(filename, False)
-    elif heuristic == 4: # CDCL + VSIDS
-        _, runtime, conflicts = CDCL.run_CDCL(filename, True)
+
+def run_solver(filename, heuristic, workers=None, seed=None, kernel='python', checkpoint=None, resume=None,
+               max_flips=None, max_tries=None):
+    if workers is not None: # Cube-and-conquer
+        import cube_and_conquer
+        _, runtime, conflicts = cube_and_conquer.run_cube_and_conquer(filename, workers, heuristic in (2, 4))
+    elif heuristic in (1, 2): # DPLL (+ VSIDS)
+        import DPLL
+        runtime, conflicts = DPLL.run_DPLL(filename, heuristic == 2)
+    elif heuristic in (3, 4): # CDCL (+ VSIDS)
+        import CDCL
+        _, runtime, conflicts = CDCL.run_CDCL(filename, heuristic == 4, kernel=kernel, checkpoint=checkpoint, resume=resume)
+    elif heuristic in LOCAL_SEARCH: # WalkSAT / ProbSAT
+        import local_search
+        _, runtime, flips, conflicts = local_search.run_local_search(
+            filename, LOCAL_SEARCH[heuristic], seed, **local_search_budget(max_flips, max_tries))
+        print("Flips:", flips)
     else:
         print("No correct heuristic selected:", heuristic)
+        return
 
     print_metrics = True
     if print_metrics:
         print("Runtime:", runtime)
         print("Conflicts:", conflicts)
 
-if __name__ == "__main__":
-    if len(sys.argv) < 3:
+
+def solve_clauses(clauses, heuristic, seed=None, max_flips=None, max_tries=None):
+    """
+    Solve a list of clause sets with the selected solver, without reading or writing files.
+    seed, max_flips and max_tries are only used by local search.
+    Returns the satisfying assignment (or None) and the number of conflicts.
+    """
+    if heuristic in (1, 2):
+        import DPLL
+        VSIDS = heuristic == 2
+        DPLL.activity_scores = {abs(lit): 0 for clause in clauses for lit in clause}
+        DPLL.conflicts = 0
+        DPLL.solution = {}
+        clauses = DPLL.remove_tautologies(clauses, False)
+        satisfiable = DPLL.DPLL({}, clauses, None, VSIDS, False)
+        return (DPLL.solution if satisfiable else None), DPLL.conflicts
+    elif heuristic in (3, 4):
+        import CDCL
+        pa, conflicts = CDCL.CDCL(clauses, heuristic == 4)
+        return (pa or None), conflicts
+    elif heuristic in LOCAL_SEARCH:
+        import CDCL
+        import local_search
+        pa, best, _ = local_search.local_search(
+            clauses, LOCAL_SEARCH[heuristic], seed, **local_search_budget(max_flips, max_tries))
+        if pa is None and best is not None:
+            pa, conflicts = CDCL.CDCL(clauses, True, phases=best)
+            return (pa or None), conflicts
+        return pa, 0
+    raise ValueError(f"No correct heuristic selected: {heuristic}")
+
+
+def solve_sudoku(sudoku_string, heuristic=4):
+    """
+    Solve a single Sudoku string. Returns the solution string, or None if there is no solution.
+    """
+    from sudoku_cnf_generator import sudoku_to_clauses, decode_solution
+    N = int(len(sudoku_string) ** 0.5)
+    pa, _ = solve_clauses(sudoku_to_clauses(sudoku_string), heuristic)
+    return decode_solution(pa, N) if pa else None
+
+
+def run_sudoku_file(filename, heuristic, cache_path=None):
+    from solution_cache import SolutionCache, solve_file
+    cache = SolutionCache(lambda sudoku_string: solve_sudoku(sudoku_string, heuristic), path=cache_path)
+    try:
+        for line_number, _, solution in solve_file(filename, cache):
+            print(f"{line_number}: {solution if solution else 'no solution'}")
+    finally:
+        cache.close()
+
+    stats = cache.stats()
+    print("Cache hits:", stats["hits"])
+    print("Cache misses:", stats["misses"])
+
+
+def main(arguments):
+    """
+    Runs one command line (without the program name). Returns the exit status.
+    """
+    if len(arguments) < 2:
         print("Usage: python SAT.py -Sn <filename>")
-        sys.exit(1)
+        return 1
+
+    if arguments[0] == "--stats":
+        from dimacs_reader import DimacsError, print_stats
+        try:
+            print_stats(arguments[1])
+        except DimacsError as e:
+            print("Error:", e)
+            return 1
+        return 0
 
-    implementation = sys.argv[1]
+    implementation = arguments[0]
     if len(implementation) != 3:
         print("Usage: python SAT.py -Sn <filename>")
 
-    run_solver(sys.argv[2], int(implementation[2]))
+    if arguments[1] == "--sudoku":
+        cache_path = arguments[arguments.index("--cache") + 1] if "--cache" in arguments else None
+        run_sudoku_file(arguments[2], int(implementation[2]), cache_path)
+        return 0
+
+    workers = int(arguments[arguments.index("--workers") + 1]) if "--workers" in arguments else None
+    seed = int(arguments[arguments.index("--seed") + 1]) if "--seed" in arguments else None
+    max_flips = int(arguments[arguments.index("--max-flips") + 1]) if "--max-flips" in arguments else None
+    max_tries = int(arguments[arguments.index("--max-tries") + 1]) if "--max-tries" in arguments else None
+    kernel = arguments[arguments.index("--kernel") + 1] if "--kernel" in arguments else 'python'
+
+    checkpoint = None
+    resume = None
+    if "--checkpoint" in arguments or "--resume" in arguments:
+        from checkpoint import Checkpointer, Snapshot
+        if "--checkpoint" in arguments:
+            interval = float(arguments[arguments.index("--checkpoint-interval") + 1]) if "--checkpoint-interval" in arguments else 60.0
+            checkpoint = Checkpointer(arguments[arguments.index("--checkpoint") + 1], interval)
+        if "--resume" in arguments:
+            resume = Snapshot.load(arguments[arguments.index("--resume") + 1])
+            print(f"Resuming after {resume.conflicts} conflicts with {len(resume.learned)} learned clauses")
+
+    try:
+        run_solver(arguments[1], int(implementation[2]), workers, seed, kernel, checkpoint, resume, max_flips, max_tries)
+    except ValueError as error:
+        print(error)
+        return 1
+    return 0
+
+
+def serve():
+    """
+    Persistent mode: runs every line of stdin as a command line, in this process.
+    """
+    import shlex  # Imports re, which is most of the import time of this module
+
+    for line in sys.stdin:
+        arguments = shlex.split(line)
+        if not arguments:
+            continue
+        try:
+            main(arguments)
+        except Exception as error:
+            print("Error:", error)
+        print("Done", flush=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--server"]:
+        serve()
+    else:
+        sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,171 @@
+"""""
+Usage: python batch_cnf_generator.py <input_filename> [encoding] [--minimal]
+where:
+    input_filename: file with one Sudoku string per line (e.g. top2365.sdk.txt)
+    encoding: at-most-one encoding, one of: pairwise, sequential, commander
+              (default: the prebuilt rules file for 4x4, 9x9 and 16x16)
+    --minimal: leave out the redundant constraints
+
+Vectorized counterpart of sudoku_cnf_generator.py: the whole file is loaded into
+a NumPy array of characters and the given-literals of all puzzles are computed
+in one step. The rules file is parsed once and shared by every puzzle.
+"""""
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from sudoku_cnf_generator import get_rules, get_rule_sets, create_output_directory
+from sudoku_rules import ENCODINGS, symbol_values, variable_base
+
+
+@lru_cache(maxsize=None)
+def char_table(N):
+    """
+    Creates a lookup table from byte values to Sudoku values (0 for an empty cell, -1 for invalid characters).
+    """
+    table = np.full(256, -1, dtype=np.int32)
+    for symbol, value in symbol_values(N).items():
+        table[ord(symbol)] = value
+    return table
+
+
+@lru_cache(maxsize=None)
+def cell_variables(N):
+    """
+    Returns, for every cell in row-major order, the variable number of that cell with value 0.
+    """
+    base = variable_base(N)
+    cells = np.arange(N * N)
+    rows = cells // N + 1
+    columns = cells % N + 1
+    return base * base * rows + base * columns
+
+
+def load_rule_sets(N, encoding=None, redundant=True):
+    """
+    Returns the rules as a tuple of frozensets, the clause format used by DPLL.py and CDCL.py.
+    The clauses are read-only, so they can be shared between the clause lists of all puzzles.
+    """
+    return get_rule_sets(N, encoding, redundant)
+
+
+def load_sudoku_array(filename):
+    """
+    Loads a file with Sudoku strings into a (puzzles, N*N) uint8 array of characters.
+    Returns the array, the line number of every puzzle and N.
+    Lines whose length is not a perfect square, and lines with a different length than the
+    first puzzle, are reported and skipped.
+    """
+    with open(filename, 'rb') as file:
+        lines = file.read().splitlines()
+
+    puzzles = []
+    line_numbers = []
+    length = None
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue  # Skip empty lines
+        root = int(len(line) ** 0.5)
+        if root * root != len(line):
+            print(f"Error: Line {line_number} in the file does not contain a valid Sudoku puzzle. Expected a perfect square grid, but got length {len(line)}.")
+            continue
+        if length is None:
+            length = len(line)
+        if len(line) != length:
+            print(f"Error: Line {line_number} has length {len(line)}, expected {length}.")
+            continue
+        puzzles.append(line)
+        line_numbers.append(line_number)
+
+    if length is None:
+        return np.zeros((0, 0), dtype=np.uint8), np.zeros(0, dtype=np.int64), 0
+
+    N = int(length ** 0.5)
+
+    grid = np.frombuffer(b"".join(puzzles), dtype=np.uint8).reshape(len(puzzles), length)
+    return grid, np.array(line_numbers), N
+
+
+def encode_givens(grid, N):
+    """
+    Computes the given-literals of all puzzles at once.
+    Returns a flat array of literals and an offsets array: the givens of puzzle i are
+    literals[offsets[i]:offsets[i + 1]].
+    """
+    values = char_table(N)[grid]
+    invalid = values < 0
+    if invalid.any():
+        for puzzle, cell in zip(*np.nonzero(invalid)):
+            print(f"Error: Invalid character '{chr(grid[puzzle, cell])}' at position ({cell // N + 1}, {cell % N + 1}) in puzzle {puzzle + 1}")
+        values = np.where(invalid, 0, values)
+
+    given = values > 0
+    literals = (cell_variables(N)[None, :] + values)[given]
+    offsets = np.zeros(len(grid) + 1, dtype=np.int64)
+    np.cumsum(given.sum(axis=1), out=offsets[1:])
+    return literals, offsets
+
+
+def load_batch(filename):
+    """
+    Loads a Sudoku file and returns (line_numbers, literals, offsets, N).
+    """
+    grid, line_numbers, N = load_sudoku_array(filename)
+    literals, offsets = encode_givens(grid, N)
+    return line_numbers, literals, offsets, N
+
+
+def iter_clauses(filename, encoding=None, redundant=True):
+    """
+    Yields (line_number, clauses) for every puzzle in the file, where clauses is a list
+    of sets that can be passed directly to DPLL.DPLL or CDCL.CDCL.
+    """
+    line_numbers, literals, offsets, N = load_batch(filename)
+    rules = load_rule_sets(N, encoding, redundant)
+    for i, line_number in enumerate(line_numbers.tolist()):
+        givens = literals[offsets[i]:offsets[i + 1]].tolist()
+        yield line_number, [{literal} for literal in givens] + list(rules)
+
+
+def write_cnf_files(filename, output_dir, encoding=None, redundant=True):
+    """
+    Writes one DIMACS file per puzzle to output_dir, named like sudoku_cnf_generator.py does.
+    """
+    line_numbers, literals, offsets, N = load_batch(filename)
+    rules_clauses, max_variable_number = get_rules(N, encoding, redundant)
+    rules_text = "\n".join(rules_clauses) + "\n"
+
+    given_lines = np.char.add(literals.astype(str), " 0\n")
+    for i, line_number in enumerate(line_numbers.tolist()):
+        start, end = offsets[i], offsets[i + 1]
+        total_clauses = int(end - start) + len(rules_clauses)
+        output_filename = os.path.join(output_dir, f"sudoku_{line_number}.cnf")
+        with open(output_filename, 'w') as cnf_file:
+            cnf_file.write(f"p cnf {max_variable_number} {total_clauses}\n")
+            cnf_file.write("".join(given_lines[start:end].tolist()))
+            cnf_file.write(rules_text)
+
+    return len(line_numbers)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python batch_cnf_generator.py <input_filename> [encoding] [--minimal]")
+        sys.exit(1)
+
+    arguments = [argument for argument in sys.argv[1:] if argument != '--minimal']
+    input_filename = arguments[0]
+    encoding = arguments[1] if len(arguments) > 1 else None
+    if not os.path.exists(input_filename):
+        print(f"Error: The file '{input_filename}' was not found.")
+        sys.exit(1)
+    if encoding is not None and encoding not in ENCODINGS:
+        print(f"Error: Unknown encoding '{encoding}'. Choose from: {', '.join(ENCODINGS)}")
+        sys.exit(1)
+
+    output_dir = create_output_directory(input_filename)
+    count = write_cnf_files(input_filename, output_dir, encoding, '--minimal' not in sys.argv)
+    print(f"{count} CNF files saved to {output_dir}")
@@ -0,0 +1,128 @@
+"""""
+Checkpoints for long CDCL runs.
+
+A snapshot holds what CDCL.CDCL has learned so far: the learned clauses with their LBD
+(number of distinct decision levels when the clause was learned) and activity (how often the
+clause was the conflict clause), the variable activity scores, the saved phases and the
+statistics. Snapshots are stored as zlib-compressed binary arrays, and are tied to the
+formula they were made for by a fingerprint of the original clauses.
+"""""
+import hashlib
+import os
+import struct
+import time
+import zlib
+from array import array
+
+MAGIC = b'CDCLCKPT'
+VERSION = 1
+HEADER = struct.Struct('<8sH32sQdIII')  # magic, version, fingerprint, conflicts, elapsed, variables, learned, literals
+
+
+def fingerprint(clauses):
+    """
+    Hash of the clauses, in order, to check a snapshot belongs to the same formula.
+    """
+    digest = hashlib.sha256()
+    for clause in clauses:
+        digest.update(array('i', sorted(clause)).tobytes())
+        digest.update(b'\0\0\0\0')
+    return digest.digest()
+
+
+class Snapshot:
+    def __init__(self, fingerprint, conflicts=0, elapsed=0.0, activity_scores=None, phases=None, learned=None):
+        self.fingerprint = fingerprint
+        self.conflicts = conflicts
+        self.elapsed = elapsed
+        self.activity_scores = activity_scores or {}
+        self.phases = phases or {}
+        self.learned = learned or []  # (clause, lbd, activity)
+
+    def to_bytes(self):
+        variables = array('i', sorted(self.activity_scores))
+        activities = array('d', (self.activity_scores[var] for var in variables))
+        phases = array('b', (-1 if var not in self.phases else int(self.phases[var]) for var in variables))
+        lengths = array('i', (len(clause) for clause, _, _ in self.learned))
+        lbds = array('i', (lbd for _, lbd, _ in self.learned))
+        clause_activities = array('f', (activity for _, _, activity in self.learned))
+        literals = array('i', (literal for clause, _, _ in self.learned for literal in clause))
+
+        header = HEADER.pack(MAGIC, VERSION, self.fingerprint, self.conflicts, self.elapsed,
+                             len(variables), len(self.learned), len(literals))
+        body = b''.join(buffer.tobytes() for buffer in
+                        (variables, activities, phases, lengths, lbds, clause_activities, literals))
+        return header + zlib.compress(body)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, formula, conflicts, elapsed, num_variables, num_learned, num_literals = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a CDCL checkpoint (or an unsupported version)")
+        body = zlib.decompress(data[HEADER.size:])
+
+        def take(typecode, count):
+            nonlocal body
+            buffer = array(typecode)
+            size = buffer.itemsize * count
+            buffer.frombytes(body[:size])
+            body = body[size:]
+            return buffer
+
+        variables = take('i', num_variables)
+        activities = take('d', num_variables)
+        phases = take('b', num_variables)
+        lengths = take('i', num_learned)
+        lbds = take('i', num_learned)
+        clause_activities = take('f', num_learned)
+        literals = take('i', num_literals)
+
+        learned = []
+        position = 0
+        for length, lbd, activity in zip(lengths, lbds, clause_activities):
+            learned.append((set(literals[position:position + length]), lbd, activity))
+            position += length
+
+        return cls(formula, conflicts, elapsed,
+                   dict(zip(variables, activities)),
+                   {var: phase == 1 for var, phase in zip(variables, phases) if phase >= 0},
+                   learned)
+
+    def save(self, path):
+        # Write to a temporary file first, so a preempted run never leaves a broken checkpoint
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(self.to_bytes())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+class Checkpointer:
+    """
+    Passed to CDCL.CDCL to save a snapshot to path every interval seconds (checked on every conflict).
+    """
+    def __init__(self, path, interval=60.0):
+        self.path = path
+        self.interval = interval
+        self.fingerprint = None
+        self.last_save = time.time()
+        self.start_time = time.time()
+        self.elapsed_before = 0.0  # Time spent in earlier runs, when resuming
+
+    def start(self, formula_fingerprint, resumed=None):
+        self.fingerprint = formula_fingerprint
+        self.last_save = self.start_time = time.time()
+        if resumed is not None:
+            self.elapsed_before = resumed.elapsed
+
+    def due(self):
+        return time.time() - self.last_save >= self.interval
+
+    def save(self, conflicts, activity_scores, phases, learned):
+        elapsed = self.elapsed_before + time.time() - self.start_time
+        Snapshot(self.fingerprint, conflicts, elapsed, activity_scores, phases, learned).save(self.path)
+        self.last_save = time.time()
@@ -0,0 +1,199 @@
+"""""
+Usage: python cube_and_conquer.py <dimacs_file> [workers] [depth]
+
+Cube-and-conquer for single hard instances. A lookahead solver splits the formula into
+cubes (sets of assumption literals), and a pool of worker processes solves the cubes with
+CDCL. The search stops as soon as one cube turns out to be satisfiable.
+"""""
+import math
+import multiprocessing
+import sys
+import time
+from collections import defaultdict
+
+import CDCL
+from propagation import Propagator
+
+# Number of candidate variables that are looked ahead on at every split
+LOOKAHEAD_CANDIDATES = 30
+
+# Cubes generated per worker, when no depth is given
+CUBES_PER_WORKER = 4
+
+
+def lookahead(propagator, assignment, candidates):
+    """
+    Looks ahead on both values of the candidate variables and picks the one that assigns the
+    most variables on both sides. Failed literals are fixed to their other value on the way.
+    Returns (variable, trail of fixed literals); variable is None if there is nothing left to
+    split on, and the trail is None if the current assignment leads to a conflict.
+    """
+    fixed = []
+    best_variable = None
+    best_score = -1
+    for variable in candidates:
+        if variable in assignment:
+            continue
+        sizes = []
+        for literal in (variable, -variable):
+            trail = propagator.propagate(assignment, [literal])
+            if trail is None:
+                sizes.append(None)
+            else:
+                sizes.append(len(trail))
+                propagator.undo(assignment, trail)
+
+        if sizes[0] is None and sizes[1] is None:
+            propagator.undo(assignment, fixed)
+            return None, None
+        if sizes[0] is None or sizes[1] is None:
+            # Failed literal: the other value is implied
+            implied = -variable if sizes[0] is None else variable
+            trail = propagator.propagate(assignment, [implied])
+            if trail is None:
+                propagator.undo(assignment, fixed)
+                return None, None
+            fixed.extend(trail)
+            continue
+
+        score = sizes[0] * sizes[1] + sizes[0] + sizes[1]
+        if score > best_score:
+            best_variable, best_score = variable, score
+
+    if best_variable in assignment:
+        # Fixed by a failed literal found later on
+        best_variable = next((variable for variable in candidates if variable not in assignment), None)
+    return best_variable, fixed
+
+
+def assigned_literals(assignment):
+    return [variable if value else -variable for variable, value in assignment.items()]
+
+
+def generate_cubes(clauses, depth, candidates=LOOKAHEAD_CANDIDATES):
+    """
+    Splits the formula into at most 2^depth cubes with a lookahead on the most frequent
+    free variables. Cubes that are refuted by propagation are left out, so an empty list
+    means the formula is unsatisfiable.
+    Every cube holds the whole assignment at its leaf: the decisions, what they imply, the
+    literals fixed by failed literals and the level 0 units, so no worker has to derive them again.
+    """
+    propagator = Propagator(clauses)
+    occurrence_counts = defaultdict(int)
+    for clause in propagator.clauses:
+        for literal in clause:
+            occurrence_counts[abs(literal)] += 1
+    variables = sorted(occurrence_counts, key=lambda variable: -occurrence_counts[variable])
+
+    assignment = {}
+    units = [next(iter(clause)) for clause in clauses if len(clause) == 1]
+    if any(len(clause) == 0 for clause in clauses) or propagator.propagate(assignment, units) is None:
+        return []
+
+    cubes = []
+
+    def split(level):
+        if level == depth:
+            cubes.append(assigned_literals(assignment))
+            return
+        free = [variable for variable in variables if variable not in assignment][:candidates]
+        variable, fixed = lookahead(propagator, assignment, free)
+        if fixed is None:
+            return  # Refuted
+        if variable is None:
+            # Nothing left to split on
+            cubes.append(assigned_literals(assignment))
+        else:
+            for literal in (-variable, variable):  # False first, like the solvers
+                trail = propagator.propagate(assignment, [literal])
+                if trail is None:
+                    continue
+                split(level + 1)
+                propagator.undo(assignment, trail)
+        propagator.undo(assignment, fixed)
+
+    split(0)
+    return cubes
+
+
+# Clauses and heuristic of a worker process, set once by init_worker
+worker_clauses = None
+worker_VSIDS = False
+
+
+def init_worker(clauses, VSIDS):
+    global worker_clauses, worker_VSIDS
+    worker_clauses = clauses
+    worker_VSIDS = VSIDS
+
+
+def solve_cube(cube):
+    """
+    Solves the formula under the cube's assignment. CDCL only gets the clauses the cube does
+    not satisfy, without their false literals.
+    """
+    assignment = {abs(literal): literal > 0 for literal in cube}
+    remaining = []
+    for clause in worker_clauses:
+        if any(assignment.get(abs(literal)) == (literal > 0) for literal in clause):
+            continue
+        remaining.append({literal for literal in clause if abs(literal) not in assignment})
+    pa, conflicts = CDCL.CDCL(remaining, worker_VSIDS)
+    if pa is False:
+        return cube, None, conflicts
+    assignment.update(pa)
+    return cube, assignment, conflicts
+
+
+def cube_and_conquer(clauses, workers=None, VSIDS=True, depth=None):
+    """
+    Solves the formula with cube-and-conquer.
+    Returns the satisfying assignment (or None), the total number of conflicts and the number of cubes.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    if depth is None:
+        depth = max(1, math.ceil(math.log2(workers * CUBES_PER_WORKER)))
+
+    cubes = generate_cubes(clauses, depth)
+    total_conflicts = 0
+    solution = None
+    if not cubes:
+        return solution, total_conflicts, 0
+
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(clauses, VSIDS)) as pool:
+        for cube, pa, conflicts in pool.imap_unordered(solve_cube, cubes):
+            total_conflicts += conflicts
+            if pa:
+                solution = pa
+                break  # Leaving the with block terminates the other workers
+    return solution, total_conflicts, len(cubes)
+
+
+def run_cube_and_conquer(filename, workers=None, VSIDS=True, depth=None):
+    clauses = CDCL.parse_dimacs(filename)
+
+    start_time = time.time()
+    pa, conflicts, cubes = cube_and_conquer(clauses, workers, VSIDS, depth)
+    end_time = time.time()
+
+    runtime = end_time - start_time
+
+    if pa:
+        print(f"Cube-and-conquer ({cubes} cubes) has found a solution to: {filename}")
+    else:
+        print(f"Cube-and-conquer ({cubes} cubes) could not find a solution for: {filename}")
+
+    return pa, runtime, conflicts
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python cube_and_conquer.py <dimacs_file> [workers] [depth]")
+        sys.exit(1)
+
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    depth = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    solution, runtime, conflicts = run_cube_and_conquer(sys.argv[1], workers, True, depth)
+
+    print("Runtime:", runtime)
+    print("Conflicts:", conflicts)
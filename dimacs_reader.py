@@ -0,0 +1,225 @@
+"""""
+Usage: python dimacs_reader.py <dimacs_file>
+
+Streaming DIMACS reader. Clauses are read one at a time, so a CNF never has to be fully
+loaded to be inspected. Plain, gzip (.gz), xz (.xz/.lzma) and bzip2 (.bz2) files are supported.
+The "p cnf" header is checked while reading: missing or repeated headers, variables above the
+declared count and a wrong clause count are reported as warnings (or errors in strict mode).
+"""""
+import importlib
+import sys
+
+# Compression modules are only imported when a file needs them
+OPENERS = {
+    '.gz': 'gzip',
+    '.xz': 'lzma',
+    '.lzma': 'lzma',
+    '.bz2': 'bz2',
+}
+
+# Clauses longer than this are counted together in the histogram
+MAX_HISTOGRAM_LENGTH = 64
+
+# Only the first warnings are kept, the others are only counted
+MAX_WARNINGS = 100
+
+
+class DimacsError(ValueError):
+    pass
+
+
+def open_dimacs(filename):
+    """
+    Opens a (possibly compressed) DIMACS file for reading as text.
+    """
+    for extension, module in OPENERS.items():
+        if filename.endswith(extension):
+            return importlib.import_module(module).open(filename, 'rt')
+    return open(filename, 'r')
+
+
+class DimacsReader:
+    """
+    Iterating over a DimacsReader yields every clause as a list of literals.
+    Clauses may span several lines, and a line may contain several clauses.
+    After iterating, header holds the declared (variables, clauses) and warnings the header
+    problems (at most MAX_WARNINGS; suppressed_warnings counts the others).
+    Without check_variables, max_variable is not tracked and variables above the declared
+    count are not reported, which makes reading faster.
+    """
+    def __init__(self, filename, strict=False, check_variables=True):
+        self.filename = filename
+        self.strict = strict
+        self.check_variables = check_variables
+        self.header = None
+        self.max_variable = 0
+        self.clause_count = 0
+        self.warnings = []
+        self.suppressed_warnings = 0
+
+    def warn(self, message):
+        if self.strict:
+            raise DimacsError(f"{self.filename}: {message}")
+        if len(self.warnings) < MAX_WARNINGS:
+            self.warnings.append(message)
+        else:
+            self.suppressed_warnings += 1
+
+    def read_header(self, line, line_number):
+        parts = line.split()
+        if len(parts) != 4 or parts[1] != 'cnf':
+            raise DimacsError(f"{self.filename}: invalid header on line {line_number}: {line.strip()}")
+        if self.header is not None:
+            self.warn(f"repeated header on line {line_number}")
+        if self.clause_count:
+            self.warn(f"header on line {line_number} appears after the first clause")
+        if not (parts[2].isdigit() and parts[3].isdigit()):
+            raise DimacsError(f"{self.filename}: invalid header on line {line_number}: {line.strip()}")
+        self.header = (int(parts[2]), int(parts[3]))
+
+    def parse_literals(self, tokens, line, line_number):
+        try:
+            return list(map(int, tokens))
+        except ValueError:
+            raise DimacsError(f"{self.filename}: invalid literal on line {line_number}: {line.strip()}") from None
+
+    def __iter__(self):
+        clause = []
+        with open_dimacs(self.filename) as f:
+            for line_number, line in enumerate(f, start=1):
+                tokens = line.split()
+                if not tokens or line.startswith('c'):
+                    continue
+
+                if not clause and tokens[-1] == '0' and tokens[0] not in ('p', '%'):
+                    # Fast path for the common case of one clause per line
+                    try:
+                        literals = list(map(int, tokens[:-1]))
+                    except ValueError:
+                        literals = self.parse_literals(tokens, line, line_number)  # Raises the DimacsError
+                    if 0 not in literals:
+                        yield self.finish(literals, line_number)
+                        continue
+
+                if line.startswith('p'):
+                    self.read_header(line, line_number)
+                    continue
+                if line.startswith('%'):
+                    break  # End marker used by some benchmark sets
+
+                for literal in self.parse_literals(tokens, line, line_number):
+                    if literal == 0:
+                        yield self.finish(clause, line_number)
+                        clause = []
+                    else:
+                        clause.append(literal)
+
+        if clause:
+            # Last clause without a terminating 0
+            yield self.finish(clause, None)
+        self.check_counts()
+
+    def finish(self, clause, line_number):
+        if self.clause_count == 0 and self.header is None:
+            self.warn("clauses before the header")
+        self.clause_count += 1
+        # Only clauses with a new highest variable need the loop
+        if self.check_variables and clause and (max(clause) > self.max_variable or -min(clause) > self.max_variable):
+            for literal in clause:
+                variable = abs(literal)
+                if variable > self.max_variable:
+                    self.max_variable = variable
+                    if self.header is not None and variable > self.header[0]:
+                        self.warn(f"variable {variable} on line {line_number} exceeds the declared {self.header[0]} variables")
+        return clause
+
+    def check_counts(self):
+        if self.header is None:
+            self.warn("missing 'p cnf' header")
+        elif self.header[1] != self.clause_count:
+            self.warn(f"header declares {self.header[1]} clauses, found {self.clause_count}")
+
+
+def read_clause_sets(filename):
+    """
+    Yields every clause as a set, the format used by DPLL.py and CDCL.py.
+    The solvers do not use the reader warnings, so variables are not checked against the header.
+    """
+    return map(set, DimacsReader(filename, check_variables=False))
+
+
+def load_clauses(filename, clauses=None):
+    """
+    Reads the clauses of a DIMACS file into clauses (a new list if not given) and returns it.
+    """
+    if clauses is None:
+        clauses = []
+    clauses.extend(read_clause_sets(filename))
+    return clauses
+
+
+def formula_stats(filename):
+    """
+    Computes formula statistics while streaming through the file. Memory use does not depend
+    on the number of clauses, but grows with the highest variable number (one byte per variable).
+    """
+    reader = DimacsReader(filename)
+    histogram = [0] * (MAX_HISTOGRAM_LENGTH + 1)
+    seen = bytearray()
+    literals = 0
+    tautologies = 0
+    duplicate_literals = 0
+
+    for clause in reader:
+        histogram[min(len(clause), MAX_HISTOGRAM_LENGTH)] += 1
+        literals += len(clause)
+        variables = set(abs(literal) for literal in clause)
+        if len(variables) < len(clause):
+            if len(set(clause)) != len(variables):
+                tautologies += 1
+            if len(set(clause)) < len(clause):
+                duplicate_literals += 1
+        if reader.max_variable >= len(seen):
+            seen.extend(bytes(max(reader.max_variable + 1 - len(seen), len(seen))))
+        for variable in variables:
+            seen[variable] = 1
+
+    return {
+        "header": reader.header,
+        "clauses": reader.clause_count,
+        "max_variable": reader.max_variable,
+        "used_variables": sum(seen),
+        "literals": literals,
+        "length_histogram": {length: count for length, count in enumerate(histogram) if count},
+        "tautologies": tautologies,
+        "clauses_with_duplicate_literals": duplicate_literals,
+        "warnings": reader.warnings,
+        "suppressed_warnings": reader.suppressed_warnings,
+    }
+
+
+def print_stats(filename):
+    stats = formula_stats(filename)
+    if stats["header"] is not None:
+        print(f"Header: {stats['header'][0]} variables, {stats['header'][1]} clauses")
+    print("Clauses:", stats["clauses"])
+    print("Max variable:", stats["max_variable"])
+    print("Used variables:", stats["used_variables"])
+    print("Literals:", stats["literals"])
+    print("Tautologies:", stats["tautologies"])
+    print("Clauses with duplicate literals:", stats["clauses_with_duplicate_literals"])
+    print("Clause length histogram:")
+    for length, count in stats["length_histogram"].items():
+        label = f"{length}+" if length == MAX_HISTOGRAM_LENGTH else str(length)
+        print(f"  {label:>4}: {count}")
+    for warning in stats["warnings"]:
+        print("Warning:", warning)
+    if stats["suppressed_warnings"]:
+        print(f"... and {stats['suppressed_warnings']} more warnings")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python dimacs_reader.py <dimacs_file>")
+        sys.exit(1)
+    print_stats(sys.argv[1])
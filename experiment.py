@@ -1,23 +1,29 @@
 """""
 Usage: python experiment.py <directory>
+       python experiment.py --shared <sudoku_file> [workers]
+       python experiment.py --startup <dimacs_file> [repeats]
 where:
     directory: directory containing sudoku's of form sudoku_*.cnf,
                default is: 'top100.sdk/'
+    --shared: solve all puzzles of a Sudoku file with one shared copy of the rules (see shared_rules.py)
+    --startup: compare the time of SAT.py runs as separate processes with SAT.py --server
 """""
 
 import glob
 import sys
 import os
+import subprocess
+import time
 import numpy as np
 
 import DPLL
 import CDCL
-import matplotlib.pyplot as plt
-import numpy as np
 
 
 
 def plot_bar_runtime(runtimes1, runtimes2, runtimes3):
+    import matplotlib.pyplot as plt  # Only needed for the report
+
     # Names for the methods
     methods = ["Basic DPLL", "DPLL VSIDS", "Basic CDCL", "CDCL VSIDS"]
     colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728']
@@ -69,6 +75,8 @@ def plot_bar_runtime(runtimes1, runtimes2, runtimes3):
 
 
 def plot_bar_conflict(conflict1, conflict2):
+    import matplotlib.pyplot as plt  # Only needed for the report
+
     # Names for the methods
     methods = ["Basic DPLL", "DPLL VSIDS", "Basic CDCL", "CDCL VSIDS"]
     colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728']
@@ -105,6 +113,8 @@ def plot_bar_conflict(conflict1, conflict2):
 
 
 def plot_bar_combined_single(runtime, conflict):
+    import matplotlib.pyplot as plt  # Only needed for the report
+
     # Names for the methods
     methods = ["Basic DPLL", "DPLL VSIDS", "Basic CDCL", "CDCL VSIDS"]
     colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728']
@@ -217,8 +227,83 @@ def run_experiment(directory="top100.sdk/", directory2=None, directory3=None):
         plot_bar_combined_single(all_runtimes[0], all_conflicts[0])
 
 
+def run_shared_experiment(sudoku_file, workers=1):
+    import shared_rules
+
+    runtimes = []
+    conflicts = []
+    for _, _, conf, runt in shared_rules.solve_batch(sudoku_file, workers):
+        runtimes.append(runt)
+        conflicts.append(conf)
+
+    print("\nShared rules CDCL:")
+    print("Mean runtime:", np.mean(runtimes), "\nStdDev:", np.std(runtimes), "\nMax runtime:", np.max(runtimes), "\nMin runtime:", np.min(runtimes))
+    print("\nMean conflicts:", np.mean(conflicts), "\nStdDev:", np.std(conflicts), "\nMax conflicts:", np.max(conflicts), "\nMin conflicts:", np.min(conflicts))
+
+
+def solver_runtime(output):
+    """
+    The "Runtime:" printed by SAT.py, i.e. the time spent solving.
+    """
+    for line in output.splitlines():
+        if line.startswith("Runtime:"):
+            return float(line.split()[1])
+    return 0.0
+
+
+def run_startup_experiment(filename, repeats=5, solver="-S4"):
+    """
+    Measures how much of a short SAT.py run is startup: a bare interpreter, SAT.py as a new
+    process per solve, and the same solves sent to one SAT.py --server process.
+    """
+    command = [sys.executable, "SAT.py", solver, filename]
+
+    interpreter = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        interpreter.append(time.perf_counter() - start_time)
+
+    process_total, process_overhead = [], []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        total = time.perf_counter() - start_time
+        process_total.append(total)
+        process_overhead.append(total - solver_runtime(output))
+
+    server_total, server_overhead = [], []
+    server = subprocess.Popen([sys.executable, "SAT.py", "--server"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            server.stdin.write(f"{solver} {filename}\n")
+            server.stdin.flush()
+            output = []
+            for line in server.stdout:
+                if line.strip() == "Done":
+                    break
+                output.append(line)
+            total = time.perf_counter() - start_time
+            server_total.append(total)
+            server_overhead.append(total - solver_runtime("".join(output)))
+    finally:
+        server.stdin.close()
+        server.wait()
+
+    print(f"\nStartup of {' '.join(command[1:])} ({repeats} runs):")
+    print("Bare interpreter:", np.mean(interpreter))
+    print("New process per solve:", np.mean(process_total), "\nOverhead (total - solver runtime):", np.mean(process_overhead))
+    print("SAT.py --server:", np.mean(server_total), "\nOverhead (total - solver runtime):", np.mean(server_overhead))
+    print("First server solve (includes the imports):", server_total[0])
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
+    if len(sys.argv) > 2 and sys.argv[1] == "--shared":
+        run_shared_experiment(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 1)
+    elif len(sys.argv) > 2 and sys.argv[1] == "--startup":
+        run_startup_experiment(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 5)
+    elif len(sys.argv) < 2:
         run_experiment()
     elif len(sys.argv) < 3:
         run_experiment(sys.argv[1])
@@ -0,0 +1,229 @@
+"""""
+Usage: python local_search.py <dimacs_file> [walksat|probsat] [seed] [max_flips] [max_tries]
+
+Stochastic local search (WalkSAT and ProbSAT) for satisfiable instances. The formula is
+first simplified with unit propagation, then a complete assignment is repaired by flipping
+variables in unsatisfied clauses. Break counts (the number of clauses that become
+unsatisfied when a variable is flipped) are kept up to date incrementally.
+Local search cannot prove unsatisfiability; run_local_search falls back to CDCL, using the
+best assignment found as the phases of the decisions.
+"""""
+import random
+import sys
+import time
+
+import CDCL
+from propagation import Propagator
+
+WALKSAT_NOISE = 0.567  # Probability of a random walk step in WalkSAT
+PROBSAT_CB = 2.3  # Base of the polynomial break function of ProbSAT
+PROBSAT_EPS = 1.0
+
+# Budget before the CDCL fallback. Random 3-SAT formulas that local search solves typically
+# need a few thousand flips; on structured formulas such as Sudokus it rarely succeeds at all
+DEFAULT_MAX_FLIPS = 20000
+DEFAULT_MAX_TRIES = 1
+
+
+class LocalSearch:
+    """
+    Clause store for local search. For every clause it keeps the number of true literals and,
+    when exactly one literal is true, the variable of that literal (the critical variable).
+    break_counts[v] is the number of clauses in which v is the critical variable.
+    """
+    def __init__(self, clauses, seed=None):
+        self.clauses = [tuple(set(clause)) for clause in clauses]  # Without duplicate literals
+        self.variables = sorted({abs(literal) for clause in self.clauses for literal in clause})
+        self.occurrences = {}
+        for i, clause in enumerate(self.clauses):
+            for literal in clause:
+                self.occurrences.setdefault(literal, []).append(i)
+        self.random = random.Random(seed)
+        self.flips = 0
+
+    def reset(self, assignment):
+        """
+        Starts from the given complete assignment and initializes all counters.
+        """
+        self.assignment = dict(assignment)
+        self.true_counts = [0] * len(self.clauses)
+        self.critical = [0] * len(self.clauses)
+        self.break_counts = dict.fromkeys(self.variables, 0)
+        self.unsatisfied = []
+        self.position = {}  # Clause index -> position in self.unsatisfied
+
+        for i, clause in enumerate(self.clauses):
+            true_literals = [literal for literal in clause if self.assignment[abs(literal)] == (literal > 0)]
+            self.true_counts[i] = len(true_literals)
+            if len(true_literals) == 1:
+                self.critical[i] = abs(true_literals[0])
+                self.break_counts[self.critical[i]] += 1
+            elif not true_literals:
+                self.add_unsatisfied(i)
+
+    def add_unsatisfied(self, i):
+        self.position[i] = len(self.unsatisfied)
+        self.unsatisfied.append(i)
+
+    def remove_unsatisfied(self, i):
+        position = self.position.pop(i)
+        last = self.unsatisfied.pop()
+        if last != i:
+            self.unsatisfied[position] = last
+            self.position[last] = position
+
+    def flip(self, variable):
+        """
+        Flips a variable and updates the true counts, critical variables and break counts.
+        """
+        self.flips += 1
+        self.assignment[variable] = not self.assignment[variable]
+        now_true = variable if self.assignment[variable] else -variable
+
+        # Clauses that lose a true literal
+        for i in self.occurrences.get(-now_true, ()):
+            self.true_counts[i] -= 1
+            if self.true_counts[i] == 0:
+                self.break_counts[variable] -= 1
+                self.add_unsatisfied(i)
+            elif self.true_counts[i] == 1:
+                for literal in self.clauses[i]:
+                    if self.assignment[abs(literal)] == (literal > 0):
+                        self.critical[i] = abs(literal)
+                        self.break_counts[abs(literal)] += 1
+                        break
+
+        # Clauses that gain a true literal
+        for i in self.occurrences.get(now_true, ()):
+            self.true_counts[i] += 1
+            if self.true_counts[i] == 1:
+                self.remove_unsatisfied(i)
+                self.critical[i] = variable
+                self.break_counts[variable] += 1
+            elif self.true_counts[i] == 2:
+                self.break_counts[self.critical[i]] -= 1
+
+    def walksat_pick(self, clause):
+        breaks = [self.break_counts[abs(literal)] for literal in clause]
+        best = min(breaks)
+        if best > 0 and self.random.random() < WALKSAT_NOISE:
+            return abs(self.random.choice(clause))
+        return abs(self.random.choice([literal for literal, b in zip(clause, breaks) if b == best]))
+
+    def probsat_pick(self, clause):
+        weights = [(PROBSAT_EPS + self.break_counts[abs(literal)]) ** -PROBSAT_CB for literal in clause]
+        return abs(self.random.choices(clause, weights)[0])
+
+    def search(self, algorithm='probsat', max_flips=DEFAULT_MAX_FLIPS, max_tries=DEFAULT_MAX_TRIES, initial=None):
+        """
+        Runs up to max_tries tries of max_flips flips each. The first try starts from initial
+        (missing variables are random), the others from a random assignment.
+        Returns (satisfying assignment or None, best assignment found).
+        """
+        pick = self.walksat_pick if algorithm == 'walksat' else self.probsat_pick
+        best_assignment = None
+        best_unsatisfied = None
+
+        for attempt in range(max_tries):
+            start = {variable: self.random.random() < 0.5 for variable in self.variables}
+            if attempt == 0 and initial:
+                start.update((variable, value) for variable, value in initial.items() if variable in start)
+            self.reset(start)
+
+            for _ in range(max_flips):
+                if best_unsatisfied is None or len(self.unsatisfied) < best_unsatisfied:
+                    best_unsatisfied = len(self.unsatisfied)
+                    best_assignment = dict(self.assignment)
+                if not self.unsatisfied:
+                    return dict(self.assignment), best_assignment
+                clause = self.clauses[self.random.choice(self.unsatisfied)]
+                self.flip(pick(clause))
+
+            if not self.unsatisfied:
+                return dict(self.assignment), dict(self.assignment)
+        return None, best_assignment
+
+
+def simplify(clauses):
+    """
+    Unit propagation at level 0. Returns the fixed assignment and the remaining clauses
+    (without satisfied clauses and false literals), or None if a conflict is found.
+    """
+    propagator = Propagator(clauses)
+    fixed = {}
+    units = [next(iter(clause)) for clause in clauses if len(clause) == 1]
+    if any(len(clause) == 0 for clause in clauses) or propagator.propagate(fixed, units) is None:
+        return None
+
+    remaining = []
+    for clause in clauses:
+        if any(fixed.get(abs(literal)) == (literal > 0) for literal in clause):
+            continue
+        remaining.append([literal for literal in clause if abs(literal) not in fixed])
+    return fixed, remaining
+
+
+def local_search(clauses, algorithm='probsat', seed=None, max_flips=DEFAULT_MAX_FLIPS, max_tries=DEFAULT_MAX_TRIES):
+    """
+    Runs local search on a list of clauses.
+    Returns (satisfying assignment or None, best assignment found, number of flips);
+    both assignments are None if unit propagation already finds a conflict.
+    """
+    simplified = simplify(clauses)
+    if simplified is None:
+        return None, None, 0
+    fixed, remaining = simplified
+    if not remaining:
+        return fixed, fixed, 0
+
+    searcher = LocalSearch(remaining, seed)
+    solution, best = searcher.search(algorithm, max_flips, max_tries)
+    if solution is not None:
+        solution.update(fixed)
+    best.update(fixed)
+    return solution, best, searcher.flips
+
+
+def warm_start_phases(clauses, algorithm='probsat', seed=None, max_flips=DEFAULT_MAX_FLIPS, max_tries=1):
+    """
+    Returns phases for CDCL.CDCL: the best assignment local search finds within the budget.
+    """
+    _, best, _ = local_search(clauses, algorithm, seed, max_flips, max_tries)
+    return best or {}
+
+
+def run_local_search(filename, algorithm='probsat', seed=None, max_flips=DEFAULT_MAX_FLIPS, max_tries=DEFAULT_MAX_TRIES):
+    clauses = CDCL.parse_dimacs(filename)
+
+    start_time = time.time()
+    pa, best, flips = local_search(clauses, algorithm, seed, max_flips, max_tries)
+    conflicts = 0
+    if pa is None and best is not None:
+        # Local search is incomplete: continue with CDCL, starting from the best assignment
+        pa, conflicts = CDCL.CDCL(clauses, True, phases=best)
+    end_time = time.time()
+
+    runtime = end_time - start_time
+
+    if pa:
+        print(f"{algorithm} has found a solution to: {filename}")
+    else:
+        print(f"{algorithm} could not find a solution for: {filename}")
+
+    return pa, runtime, flips, conflicts
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python local_search.py <dimacs_file> [walksat|probsat] [seed] [max_flips] [max_tries]")
+        sys.exit(1)
+
+    algorithm = sys.argv[2] if len(sys.argv) > 2 else 'probsat'
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    max_flips = int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_MAX_FLIPS
+    max_tries = int(sys.argv[5]) if len(sys.argv) > 5 else DEFAULT_MAX_TRIES
+    solution, runtime, flips, conflicts = run_local_search(sys.argv[1], algorithm, seed, max_flips, max_tries)
+
+    print("Runtime:", runtime)
+    print("Flips:", flips)
+    print("Conflicts:", conflicts)
@@ -0,0 +1,170 @@
+"""""
+Usage: python numpy_kernel.py <dimacs_file> [<dimacs_file> ...]
+
+Array-based unit propagation. The clause database is stored as flat int32 arrays (literals,
+the variable and sign of every literal and the clause it belongs to), and the assignment as a
+dense int8 vector (1 true, -1 false, 0 unassigned). Every propagation round evaluates all
+literals at once with a gather on the assignment vector, reduces them per clause, and
+assigns all unit literals together.
+
+Running this file compares the NumPy kernel with the pure Python unit_propagation from
+CDCL.py, for level 0 propagation and for a full CDCL run.
+"""""
+import sys
+import time
+
+import numpy as np
+
+
+class UnitPropagator:
+    """
+    Drop-in replacement for CDCL.unit_propagation: calling it has the same arguments and
+    result. Clauses appended to the clause list (learned clauses) are added to the arrays
+    on the next call. The arrays have spare capacity, so adding a learned clause only writes
+    its own literals.
+    """
+    def __init__(self, clauses=()):
+        self.count = 0  # Clauses in the arrays
+        self.size = 0  # Literals in the arrays
+        self.non_empty_count = 0
+        self.buffers = {
+            'literals': np.zeros(0, dtype=np.int32),
+            'variables': np.zeros(0, dtype=np.int32),
+            'signs': np.zeros(0, dtype=np.int8),
+            'clause_of': np.zeros(0, dtype=np.int32),
+        }
+        # Per non-empty clause (reduceat needs a start for every clause that has literals)
+        self.clause_buffers = {
+            'non_empty': np.zeros(0, dtype=np.int64),
+            'starts': np.zeros(0, dtype=np.int64),
+        }
+        self.empty = []
+        self.max_variable = 0
+        self.sync(clauses)
+
+    @staticmethod
+    def reserve(buffers, size):
+        """
+        Makes every buffer hold at least size elements, doubling the capacity when it grows.
+        """
+        for name, buffer in buffers.items():
+            if len(buffer) < size:
+                grown = np.zeros(max(size, 2 * len(buffer)), dtype=buffer.dtype)
+                grown[:len(buffer)] = buffer
+                buffers[name] = grown
+
+    def sync(self, clauses):
+        """
+        Adds the clauses that are not in the arrays yet.
+        """
+        if len(clauses) == self.count:
+            return
+        new = clauses[self.count:]
+        lengths = np.fromiter((len(clause) for clause in new), dtype=np.int64, count=len(new))
+        literals = np.fromiter((literal for clause in new for literal in clause), dtype=np.int32, count=int(lengths.sum()))
+        indices = np.arange(self.count, self.count + len(new), dtype=np.int32)
+        non_empty = lengths > 0
+        self.empty.extend(int(i) for i in indices[~non_empty])
+
+        start, end = self.size, self.size + len(literals)
+        self.reserve(self.buffers, end)
+        self.buffers['literals'][start:end] = literals
+        self.buffers['variables'][start:end] = np.abs(literals)
+        self.buffers['signs'][start:end] = np.sign(literals)
+        self.buffers['clause_of'][start:end] = np.repeat(indices, lengths)
+
+        first, last = self.non_empty_count, self.non_empty_count + int(non_empty.sum())
+        self.reserve(self.clause_buffers, last)
+        self.clause_buffers['non_empty'][first:last] = indices[non_empty]
+        self.clause_buffers['starts'][first:last] = (start + np.cumsum(lengths) - lengths)[non_empty]
+
+        if len(literals):
+            self.max_variable = max(self.max_variable, int(self.buffers['variables'][start:end].max()))
+        self.size, self.non_empty_count, self.count = end, last, len(clauses)
+
+        # Views on the filled part of the buffers
+        self.literals = self.buffers['literals'][:end]
+        self.variables = self.buffers['variables'][:end]
+        self.signs = self.buffers['signs'][:end]
+        self.clause_of = self.buffers['clause_of'][:end]
+        self.non_empty = self.clause_buffers['non_empty'][:last]
+        self.starts = self.clause_buffers['starts'][:last]
+
+    def clause_state(self, values):
+        """
+        Returns the status of every literal (1 true, -1 false, 0 unassigned) and, per
+        non-empty clause, whether it is satisfied and how many literals are unassigned.
+        """
+        status = values[self.variables] * self.signs
+        satisfied = np.logical_or.reduceat(status == 1, self.starts)
+        free = np.add.reduceat((status == 0).astype(np.int32), self.starts)
+        return status, satisfied, free
+
+    def __call__(self, pa, clauses, decision_levels, antecedents, current_level, activity_scores, verbose=False):
+        self.sync(clauses)
+        if self.empty:
+            return clauses[self.empty[0]]
+
+        values = np.zeros(self.max_variable + 1, dtype=np.int8)
+        for var, value in pa.items():
+            if var <= self.max_variable:
+                values[var] = 1 if value else -1
+
+        while True:
+            status, satisfied, free = self.clause_state(values)
+            open_clauses = ~satisfied
+
+            conflicts = self.non_empty[open_clauses & (free == 0)]
+            if len(conflicts):
+                clause = clauses[conflicts[0]]
+                if verbose:
+                    print(f"Conflict detected during unit propagation at level {current_level} in clause {clause}")
+                for literal in clause:
+                    activity_scores[abs(literal)] += 1  # Update conflict counts
+                return clause
+
+            unit = np.zeros(self.count, dtype=bool)
+            unit[self.non_empty[open_clauses & (free == 1)]] = True
+            positions = np.flatnonzero((status == 0) & unit[self.clause_of])
+            if not len(positions):
+                return None
+
+            # Assign every unit literal; if a variable is forced both ways, the next round finds the conflict
+            literals = self.literals[positions]
+            _, first = np.unique(np.abs(literals), return_index=True)
+            for literal, owner in zip(literals[first].tolist(), self.clause_of[positions[first]].tolist()):
+                var = abs(literal)
+                pa[var] = literal > 0
+                decision_levels[var] = current_level
+                antecedents[var] = clauses[owner]
+                values[var] = 1 if literal > 0 else -1
+                if verbose:
+                    print(f"Unit propagation: Assigned {literal} at level {current_level} due to clause {clauses[owner]}")
+
+
+def benchmark(filename):
+    import CDCL
+
+    clauses = CDCL.parse_dimacs(filename)
+    print(f"{filename}: {len(clauses)} clauses")
+    kernels = {"python": CDCL.unit_propagation, "numpy": None}
+    for name in kernels:
+        start_time = time.perf_counter()
+        propagate = kernels[name] or UnitPropagator(clauses)
+        pa, activity_scores = {}, {abs(l): 0 for clause in clauses for l in clause}
+        conflict = propagate(pa, clauses, {}, {}, 0, activity_scores)
+        level0 = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        solution, conflicts = CDCL.CDCL(list(clauses), True, kernel=name)
+        total = time.perf_counter() - start_time
+        print(f"  {name:>6}: level 0 propagation {level0:.4f}s ({len(pa)} assigned{', conflict' if conflict else ''}), "
+              f"CDCL {total:.4f}s ({conflicts} conflicts)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python numpy_kernel.py <dimacs_file> [<dimacs_file> ...]")
+        sys.exit(1)
+    for filename in sys.argv[1:]:
+        benchmark(filename)
@@ -0,0 +1,64 @@
+"""""
+Unit propagation on clause lists with occurrence lists. Used by the lookahead of
+cube_and_conquer.py and by the simplification before local search in local_search.py.
+"""""
+from collections import defaultdict
+
+
+class Propagator:
+    """
+    Unit propagation with occurrence lists, used for the lookahead.
+    Assignments are a dictionary from variable to truth value, like in DPLL.py and CDCL.py.
+    """
+    def __init__(self, clauses):
+        self.clauses = [tuple(clause) for clause in clauses]
+        self.occurrences = defaultdict(list)
+        for i, clause in enumerate(self.clauses):
+            for literal in clause:
+                self.occurrences[literal].append(i)
+
+    def propagate(self, assignment, literals):
+        """
+        Assigns the literals and everything they imply.
+        Returns the list of assigned literals, or None on a conflict (then nothing is assigned).
+        """
+        trail = []
+        queue = list(literals)
+        while queue:
+            literal = queue.pop()
+            variable = abs(literal)
+            if variable in assignment:
+                if assignment[variable] != (literal > 0):
+                    self.undo(assignment, trail)
+                    return None
+                continue
+            assignment[variable] = literal > 0
+            trail.append(literal)
+
+            # Only clauses containing the negation can become unit or conflicting
+            for i in self.occurrences[-literal]:
+                unassigned = None
+                count = 0
+                satisfied = False
+                for other in self.clauses[i]:
+                    value = assignment.get(abs(other))
+                    if value is None:
+                        count += 1
+                        unassigned = other
+                        if count > 1:
+                            break
+                    elif value == (other > 0):
+                        satisfied = True
+                        break
+                if satisfied or count > 1:
+                    continue
+                if count == 0:
+                    self.undo(assignment, trail)
+                    return None
+                queue.append(unassigned)
+        return trail
+
+    @staticmethod
+    def undo(assignment, trail):
+        for literal in trail:
+            del assignment[abs(literal)]
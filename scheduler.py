@@ -0,0 +1,192 @@
+"""""
+Usage: python scheduler.py <sudoku_file> [workers] [--probe-conflicts K]
+
+Difficulty-aware scheduling of a batch of Sudokus, solved with the CDCL overlay on the shared
+rules of shared_rules.py. CDCL.py is not used: it was more than 7 times slower on every
+puzzle of the measured batches, so routing hard puzzles to it never paid off.
+
+The runtime of a puzzle is hard to predict from the puzzle itself, so the scheduler runs the
+solver for a while instead:
+    1. Probe: every puzzle is solved with a budget of PROBE_CONFLICTS conflicts, in file order.
+       Most puzzles are decided within the budget.
+    2. The undecided puzzles continue from the level 0 trail and the learned clauses of their
+       probe. They are handed to the workers longest predicted runtime first, where the
+       prediction is the number of variables still unassigned at level 0 after the probe.
+
+Running this file compares the makespans, i.e. the time until the last puzzle is solved, with
+solving every puzzle in one pass in file order (like shared_rules.py), and with the best
+possible order (longest first by the measured runtimes). A suspended search continues exactly
+where it stopped, so the one pass runtime of a puzzle is its probe and second phase runtime
+together. The makespans for 1, 2, 4 and 8 workers are computed from the measured runtimes with
+list scheduling, so they do not depend on how many cores the machine running the comparison
+has (run it with one worker on a machine with few cores).
+"""""
+import heapq
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+
+from batch_cnf_generator import load_batch, load_rule_sets
+from shared_rules import UNKNOWN, PuzzleState, SharedRules
+
+# Conflicts a puzzle may take in the probe before it is scheduled as a hard puzzle
+PROBE_CONFLICTS = 10
+
+REPORT_WORKERS = (1, 2, 4, 8)
+
+
+def makespan(durations, workers):
+    """
+    Time until the last job finishes when the jobs are started in the given order, every job
+    on the first worker that becomes free.
+    """
+    finish_times = [0.0] * workers
+    for duration in durations:
+        heapq.heapreplace(finish_times, finish_times[0] + duration)
+    return max(finish_times)
+
+
+# Set before the worker processes are forked, like in shared_rules.py
+batch_rules = None
+batch_literals = None
+batch_offsets = None
+
+
+def givens(i):
+    return batch_literals[batch_offsets[i]:batch_offsets[i + 1]].tolist()
+
+
+def solve_task(i):
+    """
+    Solves puzzle i in one pass. Returns (i, model or None, conflicts, runtime).
+    """
+    start_time = time.time()
+    state = PuzzleState(batch_rules, givens(i))
+    model = state.solve()
+    return i, model, state.conflicts, time.time() - start_time
+
+
+def probe_task(task):
+    """
+    Solves puzzle i with a conflict budget. Returns (i, model or None or UNKNOWN, conflicts, runtime,
+    hard), where hard is None when the puzzle was decided, and otherwise the number of variables
+    left at level 0 and the suspended search.
+    """
+    i, max_conflicts = task
+    start_time = time.time()
+    state = PuzzleState(batch_rules, givens(i))
+    model = state.solve(max_conflicts)
+    hard = None
+    if model is UNKNOWN:
+        level_zero = state.trail_limits[0] if state.trail_limits else len(state.trail)
+        hard = len(batch_rules.variables) - level_zero, state.suspend()
+    return i, model, state.conflicts, time.time() - start_time, hard
+
+
+def finish_task(task):
+    """
+    Continues puzzle i from the suspended search of its probe. Returns (i, model or None, conflicts, runtime).
+    """
+    i, suspended = task
+    start_time = time.time()
+    state = PuzzleState(batch_rules, givens(i))
+    state.resume(suspended)
+    model = state.solve()
+    return i, model, state.conflicts, time.time() - start_time
+
+
+def run_tasks(function, tasks, workers):
+    """
+    Yields the results of function for the tasks, in order for one worker, in completion order otherwise.
+    """
+    if workers == 1:
+        yield from map(function, tasks)
+        return
+    context = multiprocessing.get_context('fork')
+    with context.Pool(workers) as pool:
+        yield from pool.imap_unordered(function, tasks)
+
+
+def load(filename):
+    """
+    Loads a Sudoku file into the globals used by the tasks. Returns the line numbers.
+    """
+    global batch_rules, batch_literals, batch_offsets
+    line_numbers, batch_literals, batch_offsets, N = load_batch(filename)
+    batch_rules = SharedRules(load_rule_sets(N))
+    return line_numbers
+
+
+def schedule_batch(filename, workers=1, probe_conflicts=PROBE_CONFLICTS):
+    """
+    Solves every puzzle of a Sudoku file with a probe and a longest-first second phase.
+    Returns the line numbers, the models (None if unsatisfiable) and conflicts of every puzzle,
+    the probe runtime of every puzzle, and the hard puzzles as (i, predicted, runtime) in the
+    order they were started, where predicted is the number of variables left at level 0.
+    """
+    line_numbers = load(filename)
+    models = [None] * len(line_numbers)
+    conflicts = [0] * len(line_numbers)
+    probe_runtimes = [0.0] * len(line_numbers)
+    predicted = {}
+    suspended = {}
+    tasks = [(i, probe_conflicts) for i in range(len(line_numbers))]
+    for i, model, count, runtime, hard in run_tasks(probe_task, tasks, workers):
+        models[i], conflicts[i], probe_runtimes[i] = model, count, runtime
+        if hard is not None:
+            predicted[i], suspended[i] = hard
+
+    order = sorted(suspended, key=lambda i: predicted[i], reverse=True)
+    runtimes = {}
+    for i, model, count, runtime in run_tasks(finish_task, [(i, suspended[i]) for i in order], workers):
+        models[i], conflicts[i], runtimes[i] = model, count, runtime
+    hard = [(i, predicted[i], runtimes[i]) for i in order]
+    return line_numbers, models, conflicts, probe_runtimes, hard
+
+
+def compare(filename, workers=1, probe_conflicts=PROBE_CONFLICTS):
+    """
+    Runs schedule_batch and prints the makespans of the schedules.
+    """
+    line_numbers, models, _, probe_runtimes, hard = schedule_batch(filename, workers, probe_conflicts)
+    unsolved = [int(line_numbers[i]) for i, model in enumerate(models) if model is None]
+
+    print(f"{filename}: {len(models)} puzzles, {workers} worker(s)")
+    print(f"Decided within {probe_conflicts} conflicts:", len(models) - len(hard))
+    if len(hard) > 2:
+        correlation = np.corrcoef([p for _, p, _ in hard], np.log([r for _, _, r in hard]))[0, 1]
+        print("Correlation of the variables left after the probe and the log remaining runtime:", correlation)
+    if unsolved:
+        print("No solution for the puzzles on lines:", unsolved)
+
+    # A suspended search continues exactly where it stopped, so one pass over a puzzle does
+    # the same work as its probe and its second phase together
+    runtimes = list(probe_runtimes)
+    for i, _, runtime in hard:
+        runtimes[i] += runtime
+
+    def row(name, durations, second=()):
+        return name, [makespan(durations, w) + makespan(second, w) for w in REPORT_WORKERS]
+
+    rows = [row("one pass, file order", runtimes),
+            row("probe, then longest first", probe_runtimes, [r for _, _, r in hard]),
+            row("probe, then file order", probe_runtimes, [r for _, _, r in sorted(hard)]),
+            row("one pass, longest measured", sorted(runtimes, reverse=True))]
+
+    print("\nMakespan in seconds for W workers, from the measured runtimes:")
+    print(f"  {'W':<28}" + "".join(f"{w:>9}" for w in REPORT_WORKERS))
+    for name, values in rows:
+        print(f"  {name:<28}" + "".join(f"{value:>9.3f}" for value in values))
+    print("Speedup over one pass:", "  ".join(f"{b / s:.2f}x" for b, s in zip(rows[0][1], rows[1][1])))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python scheduler.py <sudoku_file> [workers] [--probe-conflicts K]")
+        sys.exit(1)
+
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 and not sys.argv[2].startswith("--") else 1
+    probe_conflicts = int(sys.argv[sys.argv.index("--probe-conflicts") + 1]) if "--probe-conflicts" in sys.argv else PROBE_CONFLICTS
+    compare(sys.argv[1], workers, probe_conflicts)
@@ -0,0 +1,382 @@
+"""""
+Usage: python shared_rules.py <sudoku_file> [workers]
+
+Batched solving of many Sudokus that share one read-only copy of the rule clauses.
+
+The rules and their occurrence index are built once, in flat array.array buffers
+(SharedRules). Every puzzle only keeps a small overlay (PuzzleState): its givens, the
+assignment, decision levels, reasons, trail and its own learned clauses. The rule buffers
+hold raw integers instead of Python objects, so forked worker processes can read them without
+touching reference counts, and the pages stay shared copy-on-write.
+"""""
+import multiprocessing
+import sys
+import time
+import tracemalloc
+from array import array
+
+import numpy as np
+
+from batch_cnf_generator import load_batch, load_rule_sets
+
+DECAY_FACTOR = 0.95
+
+# Returned by PuzzleState.solve when the conflict budget runs out before the puzzle is decided
+UNKNOWN = 'unknown'
+
+
+def literal_index(literal):
+    return 2 * abs(literal) + (literal < 0)
+
+
+class SharedRules:
+    """
+    Read-only clause store: the literals of all clauses in one flat buffer, and for every
+    literal the clauses it occurs in.
+    """
+    def __init__(self, clauses):
+        self.num_clauses = len(clauses)
+        self.literals = array('i')
+        self.starts = array('i', [0])
+        for clause in clauses:
+            self.literals.extend(clause)
+            self.starts.append(len(self.literals))
+
+        self.num_variables = max((abs(literal) for literal in self.literals), default=0)
+        counts = [0] * (2 * self.num_variables + 3)
+        for literal in self.literals:
+            counts[literal_index(literal) + 1] += 1
+        occurrence_starts = array('i', [0])
+        for count in counts[1:]:
+            occurrence_starts.append(occurrence_starts[-1] + count)
+        occurrences = array('i', bytes(4 * len(self.literals)))
+        filled = array('i', occurrence_starts)
+        for c in range(self.num_clauses):
+            for k in range(self.starts[c], self.starts[c + 1]):
+                index = literal_index(self.literals[k])
+                occurrences[filled[index]] = c
+                filled[index] += 1
+        self.occurrence_starts = occurrence_starts
+        self.occurrences = occurrences
+
+        self.variables = array('i', sorted({abs(literal) for literal in self.literals}))
+        self.units = [self.literals[self.starts[c]] for c in range(self.num_clauses)
+                      if self.starts[c + 1] - self.starts[c] == 1]
+
+    def clause(self, c):
+        return self.literals[self.starts[c]:self.starts[c + 1]]
+
+    def nbytes(self):
+        return sum(buffer.itemsize * len(buffer) for buffer in
+                   (self.literals, self.starts, self.occurrence_starts, self.occurrences, self.variables))
+
+
+class PuzzleState:
+    """
+    The per-puzzle overlay on top of SharedRules, solved with CDCL (1UIP learning, VSIDS-style
+    activities, decisions assign False like CDCL.py).
+    Clause ids below rules.num_clauses refer to the rules, higher ids to the learned clauses.
+    """
+    def __init__(self, rules, givens):
+        n = rules.num_variables + 1
+        self.rules = rules
+        self.givens = list(givens)
+        self.values = bytearray(n)  # 0 unassigned, 1 true, 2 false
+        self.levels = array('i', bytes(4 * n))
+        self.reasons = array('i', [-1]) * n
+        self.activity = array('d', bytes(8 * n))
+        self.activity_increment = 1.0
+        self.trail = []
+        self.trail_limits = []  # Trail length at the start of every decision level
+        self.queue_head = 0
+        self.learned = []
+        self.learned_occurrences = {}
+        self.conflicts = 0
+
+    def clause(self, c):
+        if c < self.rules.num_clauses:
+            return self.rules.clause(c)
+        return self.learned[c - self.rules.num_clauses]
+
+    def value(self, literal):
+        """
+        Returns True or False for an assigned literal, None for an unassigned one.
+        """
+        value = self.values[abs(literal)]
+        if value == 0:
+            return None
+        return (value == 1) == (literal > 0)
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = 1 if literal > 0 else 2
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def visit(self, c):
+        """
+        Checks a clause after one of its literals became false.
+        Assigns the last free literal of a unit clause; returns c if the clause is falsified.
+        """
+        free = None
+        for literal in self.clause(c):
+            value = self.value(literal)
+            if value is None:
+                if free is not None:
+                    return None
+                free = literal
+            elif value:
+                return None
+        if free is None:
+            return c
+        self.assign(free, c)
+        return None
+
+    def propagate(self):
+        """
+        Unit propagation over the shared occurrence index and the learned clauses.
+        Returns the id of a falsified clause, or None.
+        """
+        rules = self.rules
+        while self.queue_head < len(self.trail):
+            false_literal = -self.trail[self.queue_head]
+            self.queue_head += 1
+            index = literal_index(false_literal)
+            for k in range(rules.occurrence_starts[index], rules.occurrence_starts[index + 1]):
+                conflict = self.visit(rules.occurrences[k])
+                if conflict is not None:
+                    return conflict
+            for c in self.learned_occurrences.get(false_literal, ()):
+                conflict = self.visit(c)
+                if conflict is not None:
+                    return conflict
+        return None
+
+    def bump(self, variable):
+        self.activity[variable] += self.activity_increment
+        if self.activity[variable] > 1e100:
+            for v in range(len(self.activity)):
+                self.activity[v] *= 1e-100
+            self.activity_increment *= 1e-100
+
+    def analyze(self, conflict):
+        """
+        First UIP conflict analysis. Returns the learned clause (asserting literal first) and the backjump level.
+        """
+        level = len(self.trail_limits)
+        seen = set()
+        learned = []
+        counter = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = self.clause(conflict)
+        while True:
+            for other in clause:
+                variable = abs(other)
+                if other == literal or variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == level:
+                    counter += 1
+                else:
+                    learned.append(other)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.clause(self.reasons[abs(literal)])
+
+        learned.insert(0, -literal)
+        backjump_level = max((self.levels[abs(other)] for other in learned[1:]), default=0)
+        return tuple(learned), backjump_level
+
+    def backtrack(self, level):
+        if len(self.trail_limits) <= level:
+            return
+        limit = self.trail_limits[level]
+        for literal in self.trail[limit:]:
+            variable = abs(literal)
+            self.values[variable] = 0
+            self.reasons[variable] = -1
+        del self.trail[limit:]
+        del self.trail_limits[level:]
+        self.queue_head = limit
+
+    def learn(self, clause):
+        c = self.rules.num_clauses + len(self.learned)
+        self.learned.append(clause)
+        for literal in clause:
+            self.learned_occurrences.setdefault(literal, []).append(c)
+        return c
+
+    def decide(self):
+        """
+        Returns the unassigned variable with the highest activity, or None if all are assigned.
+        """
+        best = None
+        best_activity = -1.0
+        for variable in self.rules.variables:
+            if self.values[variable] == 0 and self.activity[variable] > best_activity:
+                best, best_activity = variable, self.activity[variable]
+        return best
+
+    def propagate_givens(self):
+        """
+        Assigns the unit rules and the givens and propagates them at level 0.
+        Returns False if this already gives a conflict.
+        """
+        for literal in self.rules.units + self.givens:
+            value = self.value(literal)
+            if value is False:
+                return False
+            if value is None:
+                self.assign(literal, -1)
+        return self.propagate() is None
+
+    def solve(self, max_conflicts=None):
+        """
+        Returns the model as a dictionary from variable to truth value, or None if unsatisfiable.
+        With max_conflicts, returns UNKNOWN once that many conflicts are reached; calling solve
+        again continues the search.
+        """
+        if not self.trail and not self.propagate_givens():
+            return None
+
+        while True:
+            if max_conflicts is not None and self.conflicts >= max_conflicts:
+                return UNKNOWN
+            variable = self.decide()
+            if variable is None:
+                return {v: self.values[v] == 1 for v in self.rules.variables}
+            self.trail_limits.append(len(self.trail))
+            self.assign(-variable, -1)
+
+            conflict = self.propagate()
+            while conflict is not None:
+                self.conflicts += 1
+                if not self.trail_limits:
+                    return None
+                learned, backjump_level = self.analyze(conflict)
+                self.activity_increment /= DECAY_FACTOR
+                self.backtrack(backjump_level)
+                self.assign(learned[0], self.learn(learned))
+                conflict = self.propagate()
+
+    def suspend(self):
+        """
+        Returns the search state without the shared rules, to continue the search in another
+        process (see resume). Clause ids stay valid, because the learned clauses keep their order.
+        """
+        suspended = dict(vars(self))
+        del suspended['rules']
+        return suspended
+
+    def resume(self, suspended):
+        """
+        Continues from the suspend of a state of the same puzzle on the same rules.
+        """
+        vars(self).update(suspended)
+
+    def nbytes(self):
+        """
+        Approximate memory used by the overlay, not counting the shared rules.
+        """
+        learned = sum(sys.getsizeof(clause) for clause in self.learned)
+        return (len(self.values) + self.levels.itemsize * len(self.levels) + self.reasons.itemsize * len(self.reasons)
+                + self.activity.itemsize * len(self.activity) + sys.getsizeof(self.trail) + learned)
+
+
+# Set before the worker processes are forked, so they share the rules copy-on-write
+shared_rules = None
+shared_literals = None
+shared_offsets = None
+
+
+def solve_puzzle(i):
+    """
+    Solves puzzle i of the shared batch. Returns (i, model or None, conflicts, runtime).
+    """
+    givens = shared_literals[shared_offsets[i]:shared_offsets[i + 1]].tolist()
+    start_time = time.time()
+    state = PuzzleState(shared_rules, givens)
+    model = state.solve()
+    return i, model, state.conflicts, time.time() - start_time
+
+
+def solve_batch(filename, workers=1, encoding=None, redundant=True):
+    """
+    Solves every puzzle in a Sudoku file with one shared copy of the rules.
+    With more than one worker, the workers are forked after the rules are built.
+    Yields (line_number, model or None, conflicts, runtime) in file order for one worker,
+    in completion order otherwise.
+    """
+    global shared_rules, shared_literals, shared_offsets
+    line_numbers, literals, offsets, N = load_batch(filename)
+    shared_rules = SharedRules(load_rule_sets(N, encoding, redundant))
+    shared_literals, shared_offsets = literals, offsets
+
+    indices = range(len(line_numbers))
+    if workers == 1:
+        for i in indices:
+            _, model, conflicts, runtime = solve_puzzle(i)
+            yield int(line_numbers[i]), model, conflicts, runtime
+        return
+
+    context = multiprocessing.get_context('fork')
+    with context.Pool(workers) as pool:
+        for i, model, conflicts, runtime in pool.imap_unordered(solve_puzzle, indices):
+            yield int(line_numbers[i]), model, conflicts, runtime
+
+
+def memory_report(filename, puzzles=20):
+    """
+    Compares the memory of puzzle overlays with giving every puzzle its own clause list, like experiment.py does.
+    """
+    line_numbers, literals, offsets, N = load_batch(filename)
+    rule_sets = load_rule_sets(N)
+    rules = SharedRules(rule_sets)
+    puzzles = min(puzzles, len(line_numbers))
+
+    tracemalloc.start()
+    copies = [[set(clause) for clause in rule_sets] for _ in range(puzzles)]
+    copies_bytes = tracemalloc.get_traced_memory()[0]
+    del copies
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    states = [PuzzleState(rules, literals[offsets[i]:offsets[i + 1]].tolist()) for i in range(puzzles)]
+    for state in states:
+        state.solve()
+    overlay_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"Shared rules: {rules.nbytes()} bytes, built once")
+    print(f"Own clause list per puzzle: {copies_bytes // puzzles} bytes")
+    print(f"Overlay per puzzle (after solving): {overlay_bytes // puzzles} bytes")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python shared_rules.py <sudoku_file> [workers]")
+        sys.exit(1)
+
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    runtimes = []
+    conflicts = []
+    unsolved = 0
+    for line_number, model, conflict_count, runtime in solve_batch(sys.argv[1], workers):
+        runtimes.append(runtime)
+        conflicts.append(conflict_count)
+        if model is None:
+            unsolved += 1
+            print(f"No solution for puzzle on line {line_number}")
+
+    print("Puzzles:", len(runtimes), "Unsolved:", unsolved)
+    print("Mean runtime:", np.mean(runtimes), "\nStdDev:", np.std(runtimes), "\nMax runtime:", np.max(runtimes))
+    print("Mean conflicts:", np.mean(conflicts), "\nMax conflicts:", np.max(conflicts))
+    memory_report(sys.argv[1])
@@ -0,0 +1,242 @@
+"""""
+Solution cache for Sudoku strings, keyed by a canonical form of the puzzle.
+
+Puzzles that only differ by a relabelling of the digits, a permutation of the rows or
+columns (within a band/stack, or of whole bands/stacks) or a transposition are mapped to
+the same canonical string, so a solution found for one of them is reused for all of them.
+The canonical string is always an actual transformation of the puzzle, so a cache hit
+always gives a correct solution. Ties between rows or columns with the same structure are
+broken by their original order, so some equivalent puzzles may still get different keys.
+"""""
+import os
+import sqlite3
+from collections import OrderedDict
+
+from sudoku_rules import EMPTY, SYMBOLS
+
+# Number of rounds in which row and column signatures are refined using each other
+REFINEMENT_ROUNDS = 3
+
+
+class Transformation:
+    """
+    A Sudoku symmetry: optional transposition, followed by a row order, a column order and a digit relabelling.
+    """
+    def __init__(self, N, transposed, row_order, column_order, relabel):
+        self.N = N
+        self.transposed = transposed
+        self.row_order = row_order
+        self.column_order = column_order
+        self.relabel = relabel  # Original symbol -> canonical symbol
+        self.unlabel = {canonical: original for original, canonical in relabel.items()}
+
+    def apply(self, sudoku_string):
+        """
+        Maps a grid in the original orientation to the canonical orientation.
+        """
+        grid = orient(sudoku_string, self.N, self.transposed)
+        return ''.join(self.relabel.get(grid[r][c], EMPTY)
+                       for r in self.row_order for c in self.column_order)
+
+    def invert(self, canonical_string):
+        """
+        Maps a grid in the canonical orientation back to the original orientation.
+        """
+        N = self.N
+        grid = [[None] * N for _ in range(N)]
+        for i, r in enumerate(self.row_order):
+            for j, c in enumerate(self.column_order):
+                grid[r][c] = self.unlabel.get(canonical_string[i * N + j], EMPTY)
+        rows = [''.join(row) for row in grid]
+        return ''.join(orient(''.join(rows), N, self.transposed))
+
+
+def orient(sudoku_string, N, transposed):
+    """
+    Returns the grid as a list of rows, transposed if requested.
+    """
+    rows = [sudoku_string[r * N:(r + 1) * N] for r in range(N)]
+    if transposed:
+        rows = [''.join(column) for column in zip(*rows)]
+    return rows
+
+
+def ranks(signatures):
+    """
+    Replaces every signature by its rank among the distinct signatures, to keep them small.
+    """
+    order = {signature: rank for rank, signature in enumerate(sorted(set(signatures)))}
+    return [order[signature] for signature in signatures]
+
+
+def line_order(signatures, box_size):
+    """
+    Orders the rows (or columns) of a grid: first the bands by the sorted signatures of
+    their rows, then the rows within each band by their own signature.
+    Python's sort is stable, so ties keep their original order.
+    """
+    bands = []
+    for band in range(box_size):
+        lines = sorted(range(band * box_size, (band + 1) * box_size), key=lambda line: signatures[line])
+        bands.append(lines)
+    bands.sort(key=lambda lines: [signatures[line] for line in lines])
+    return [line for lines in bands for line in lines]
+
+
+def canonicalize(sudoku_string):
+    """
+    Computes the canonical form of a Sudoku string.
+    Returns the canonical string and the Transformation that produces it.
+    Lowercase letters are treated as the uppercase ones, see sudoku_rules.SYMBOLS.
+    """
+    sudoku_string = sudoku_string.upper()
+    N = int(len(sudoku_string) ** 0.5)
+    box_size = int(round(N ** 0.5))
+    if N * N != len(sudoku_string) or box_size * box_size != N:
+        raise ValueError("Invalid Sudoku puzzle size.")
+    if N > len(SYMBOLS):
+        raise ValueError(f"Sudokus larger than {len(SYMBOLS)}x{len(SYMBOLS)} have no symbols")
+    symbols = SYMBOLS[:N]
+
+    best = None
+    for transposed in (False, True):
+        rows = orient(sudoku_string, N, transposed)
+        given = [[cell != EMPTY for cell in row] for row in rows]
+
+        # Signatures only depend on which cells are given and how often each digit occurs,
+        # so they are invariant under relabelling. A few rounds of refinement separate
+        # rows and columns that look the same at first.
+        digit_count = {}
+        for row in rows:
+            for cell in row:
+                digit_count[cell] = digit_count.get(cell, 0) + 1
+        row_signatures = ranks([(sum(given[r]), tuple(sorted(digit_count[rows[r][c]] for c in range(N) if given[r][c]))) for r in range(N)])
+        column_signatures = ranks([(sum(given[r][c] for r in range(N)), tuple(sorted(digit_count[rows[r][c]] for r in range(N) if given[r][c]))) for c in range(N)])
+        for _ in range(REFINEMENT_ROUNDS):
+            row_signatures, column_signatures = (
+                ranks([(row_signatures[r], tuple(sorted(column_signatures[c] for c in range(N) if given[r][c]))) for r in range(N)]),
+                ranks([(column_signatures[c], tuple(sorted(row_signatures[r] for r in range(N) if given[r][c]))) for c in range(N)]),
+            )
+
+        row_order = line_order(row_signatures, box_size)
+        column_order = line_order(column_signatures, box_size)
+
+        # Relabel the digits in order of first appearance
+        relabel = {}
+        for r in row_order:
+            for c in column_order:
+                symbol = rows[r][c]
+                if symbol != EMPTY and symbol not in relabel:
+                    relabel[symbol] = symbols[len(relabel)]
+        unused = [symbol for symbol in symbols if symbol not in relabel]
+        for symbol, canonical in zip(unused, symbols[len(relabel):]):
+            relabel[symbol] = canonical
+
+        transformation = Transformation(N, transposed, row_order, column_order, relabel)
+        canonical = transformation.apply(sudoku_string)
+        if best is None or canonical < best[0]:
+            best = (canonical, transformation)
+    return best
+
+
+class SolutionCache:
+    """
+    LRU cache from canonical puzzles to canonical solutions, with an optional SQLite file
+    that keeps the solutions between runs.
+    solver: function that takes a Sudoku string and returns its solution string, or None if it has no solution.
+    """
+    def __init__(self, solver, maxsize=10000, path=None):
+        self.solver = solver
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS solutions (puzzle TEXT PRIMARY KEY, solution TEXT)")
+
+    def get(self, canonical):
+        """
+        Looks up a canonical puzzle. Returns the canonical solution ('' for no solution) or None on a miss.
+        """
+        if canonical in self.entries:
+            self.entries.move_to_end(canonical)
+            return self.entries[canonical]
+        if self.db is not None:
+            row = self.db.execute("SELECT solution FROM solutions WHERE puzzle = ?", (canonical,)).fetchone()
+            if row is not None:
+                self.remember(canonical, row[0])
+                return row[0]
+        return None
+
+    def put(self, canonical, solution):
+        self.remember(canonical, solution)
+        if self.db is not None:
+            self.db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?)", (canonical, solution))
+            self.db.commit()
+
+    def remember(self, canonical, solution):
+        self.entries[canonical] = solution
+        self.entries.move_to_end(canonical)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def lookup(self, sudoku_string):
+        """
+        Looks up a Sudoku string and counts the hit or miss.
+        Returns (canonical, transformation, cached), where cached is the canonical solution
+        ('' for no solution) or None on a miss. After a miss, pass the first two to store.
+        """
+        canonical, transformation = canonicalize(sudoku_string)
+        cached = self.get(canonical)
+        if cached is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return canonical, transformation, cached
+
+    def store(self, canonical, transformation, solution):
+        """
+        Stores the solution string (None if there is no solution) found for the puzzle of a lookup.
+        """
+        self.put(canonical, transformation.apply(solution) if solution else '')
+
+    def solve(self, sudoku_string):
+        """
+        Returns the solution of a Sudoku string, from the cache if an equivalent puzzle was solved before.
+        """
+        canonical, transformation, solution = self.lookup(sudoku_string)
+        if solution is None:
+            found = self.solver(sudoku_string)
+            self.store(canonical, transformation, found)
+            solution = transformation.apply(found) if found else ''
+        return transformation.invert(solution) if solution else None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.entries),
+        }
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+def solve_file(filename, cache):
+    """
+    Solves every Sudoku string in a file through the cache, yielding (line_number, puzzle, solution).
+    """
+    if not os.path.exists(filename):
+        raise FileNotFoundError(f"The file '{filename}' was not found.")
+    with open(filename, 'r') as file:
+        for line_number, line in enumerate(file, start=1):
+            sudoku_string = line.strip()
+            if not sudoku_string:
+                continue  # Skip empty lines
+            yield line_number, sudoku_string, cache.solve(sudoku_string)
@@ -0,0 +1,116 @@
+"""""
+Usage: python solve_client.py <sudoku_file> [--port PORT] [--concurrency N] [--repeat N] [--solver n] [--timeout SECONDS]
+
+Stand-in client and load generator for solve_service.py. Sends every Sudoku string in the
+file (repeat times) to the service, keeping at most concurrency requests in flight, and
+reports the throughput and the latency distribution.
+"""""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from solve_service import DEFAULT_PORT
+
+
+class SolveClient:
+    """
+    Connection to a running solve service. Results are matched to requests by id.
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.waiting = {}
+        self.next_id = 0
+        self.receiver = asyncio.create_task(self.receive())
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=DEFAULT_PORT):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def receive(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            result = json.loads(line)
+            future = self.waiting.pop(result.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(result)
+
+    async def solve(self, **request):
+        """
+        Sends a request (sudoku=... or dimacs=..., optionally solver and timeout) and waits for its result.
+        """
+        self.next_id += 1
+        request["id"] = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request["id"]] = future
+        self.writer.write((json.dumps(request) + "\n").encode())
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.receiver.cancel()
+
+
+async def generate_load(puzzles, host, port, concurrency, solver, timeout):
+    """
+    Solves all puzzles through the service with at most concurrency requests in flight.
+    Returns the latency of every request, the statuses and the total wall time.
+    """
+    client = await SolveClient.connect(host, port)
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = {}
+
+    async def send(puzzle):
+        async with slots:
+            start_time = time.perf_counter()
+            request = {"sudoku": puzzle, "solver": solver}
+            if timeout is not None:
+                request["timeout"] = timeout
+            result = await client.solve(**request)
+            latencies.append(time.perf_counter() - start_time)
+            statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(send(puzzle) for puzzle in puzzles))
+    wall_time = time.perf_counter() - start_time
+    await client.close()
+    return latencies, statuses, wall_time
+
+
+def main(arguments):
+    with open(arguments.sudoku_file, 'r') as file:
+        puzzles = [line.strip() for line in file if line.strip()] * arguments.repeat
+
+    latencies, statuses, wall_time = asyncio.run(generate_load(
+        puzzles, arguments.host, arguments.port, arguments.concurrency, arguments.solver, arguments.timeout))
+
+    print("Requests:", len(puzzles))
+    print("Statuses:", statuses)
+    print("Wall time:", wall_time)
+    print("Throughput (requests/s):", len(puzzles) / wall_time)
+    print("Mean latency:", np.mean(latencies))
+    print("p50 latency:", np.percentile(latencies, 50))
+    print("p95 latency:", np.percentile(latencies, 95))
+    print("p99 latency:", np.percentile(latencies, 99))
+    print("Max latency:", np.max(latencies))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Client and load generator for solve_service.py.")
+    parser.add_argument("sudoku_file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum number of requests in flight")
+    parser.add_argument("--repeat", type=int, default=1, help="send the puzzles this many times")
+    parser.add_argument("--solver", type=int, default=4, help="n of SAT.py -Sn")
+    parser.add_argument("--timeout", type=float, default=None, help="timeout per request in seconds")
+    main(parser.parse_args())
@@ -0,0 +1,361 @@
+"""""
+Usage: python solve_service.py [--port PORT | --stdin] [--workers N] [--max-pending N] [--timeout SECONDS]
+                               [--cache FILE | --no-cache]
+
+Asyncio front end for the solvers. Requests are JSON lines, read from a local TCP socket
+(default 127.0.0.1:8765) or from stdin, and results are streamed back as JSON lines as
+soon as they are ready, so they can arrive in a different order than the requests.
+
+Requests:
+    {"id": 1, "sudoku": "52...6....", "solver": 4, "timeout": 10}
+    {"id": 2, "dimacs": "p cnf 3 2\\n1 -3 0\\n2 3 -1 0\\n"}
+    {"cancel": 1}
+where solver is the n of SAT.py -Sn (default 4) and timeout is in seconds (optional).
+Local search requests (solver 5 and 6) may also set "seed", "max_flips" and "max_tries".
+
+Results:
+    {"id": 1, "status": "SAT", "solution": "527316....", "conflicts": 3, "runtime": 0.2}
+    {"id": 2, "status": "SAT", "model": [1, 2, -3], "conflicts": 0, "runtime": 0.0}
+    status is one of SAT, UNSAT, TIMEOUT, CANCELLED or ERROR (with an "error" message).
+
+Sudoku requests go through a solution_cache.SolutionCache first (in memory, or also in an
+SQLite file with --cache), so equivalent puzzles are only solved once; cached results
+have "cached": true.
+
+Every worker is a separate process that loads the rules files once at startup. A request
+that times out or is cancelled kills its worker, which is then restarted.
+"""""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+import sys
+import time
+
+DEFAULT_PORT = 8765
+
+SOLVERS = (1, 2, 3, 4, 5, 6)  # The n of SAT.py -Sn
+
+
+def parse_dimacs_text(text):
+    """
+    Parse DIMACS text into a list of sets, like parse_dimacs in DPLL.py and CDCL.py does for files.
+    """
+    clauses = []
+    for line in text.splitlines():
+        if line.startswith('p') or line.startswith('c') or not line.strip():
+            continue
+        clauses.append({int(x) for x in line.strip().split()[:-1]})  # Remove trailing 0
+    return clauses
+
+
+def request_error(request):
+    """
+    Returns why a request cannot be handled, or None if it is valid.
+    """
+    if not isinstance(request, dict):
+        return "A request must be a JSON object"
+    for key in ("id", "cancel"):
+        if not isinstance(request.get(key), (str, int, float, type(None))):
+            return f"Invalid {key}: {request[key]!r}"
+    if "cancel" in request:
+        return None
+    if not isinstance(request.get("sudoku", request.get("dimacs")), str):
+        return "Request needs a 'sudoku' or 'dimacs' string"
+    solver = request.get("solver", 4)
+    if isinstance(solver, bool) or solver not in SOLVERS:
+        return f"Unknown solver: {solver!r}"
+    for key in ("max_flips", "max_tries"):
+        value = request.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value <= 0):
+            return f"Invalid {key}: {value!r}"
+    seed = request.get("seed")
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+        return f"Invalid seed: {seed!r}"
+    timeout = request.get("timeout")
+    if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+        return f"Invalid timeout: {timeout!r}"
+    return None
+
+
+def handle_request(request):
+    """
+    Solves a single request inside a worker process and returns the result dictionary.
+    """
+    # Imported here so the event loop process does not need the solvers
+    import SAT
+    from sudoku_cnf_generator import sudoku_to_clauses, decode_solution
+
+    heuristic = int(request.get("solver", 4))
+    options = {key: request.get(key) for key in ("seed", "max_flips", "max_tries")}
+    start_time = time.time()
+    if "sudoku" in request:
+        sudoku_string = request["sudoku"].strip()
+        pa, conflicts = SAT.solve_clauses(sudoku_to_clauses(sudoku_string), heuristic, **options)
+        result = {"status": "SAT" if pa else "UNSAT", "conflicts": conflicts}
+        if pa:
+            result["solution"] = decode_solution(pa, int(len(sudoku_string) ** 0.5))
+    elif "dimacs" in request:
+        pa, conflicts = SAT.solve_clauses(parse_dimacs_text(request["dimacs"]), heuristic, **options)
+        result = {"status": "SAT" if pa else "UNSAT", "conflicts": conflicts}
+        if pa:
+            result["model"] = sorted((var if value else -var for var, value in pa.items()), key=abs)
+    else:
+        raise ValueError("Request needs a 'sudoku' or 'dimacs' field")
+    result["runtime"] = time.time() - start_time
+    return result
+
+
+def worker_main(conn):
+    """
+    Main loop of a worker process: keep the solvers and rules loaded and solve requests from the pipe.
+    """
+    # Import the solvers and parse the rules into clause sets before the first request
+    import SAT
+    import CDCL
+    import DPLL
+    import local_search
+    from batch_cnf_generator import load_rule_sets
+    from sudoku_cnf_generator import RULES_FILES
+    for N in RULES_FILES:
+        load_rule_sets(N)
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        try:
+            result = handle_request(request)
+        except Exception as e:
+            result = {"status": "ERROR", "error": str(e)}
+        conn.send(result)
+
+
+class Worker:
+    """
+    A solver process connected with a pipe. It is killed and restarted when a request is abandoned.
+    Results are received on a thread of executor, which the service sizes to one thread per worker.
+    """
+    def __init__(self, executor):
+        self.executor = executor
+        self.start()
+
+    def start(self):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def restart(self):
+        self.process.kill()
+        self.process.join()
+        # The old connection is not closed here: a thread may still be blocked in recv on it,
+        # which returns with EOFError now that the process is gone
+        self.start()
+
+    async def solve(self, request, timeout):
+        try:
+            self.conn.send(request)
+            loop = asyncio.get_running_loop()
+            return await asyncio.wait_for(loop.run_in_executor(self.executor, self.conn.recv), timeout)
+        except BaseException:
+            # The process may still be working on the request; its result must not reach the next one
+            self.restart()
+            raise
+
+    def stop(self):
+        self.process.kill()
+        self.process.join()
+
+
+class SolveService:
+    """
+    Dispatches requests to a fixed pool of workers.
+    At most max_pending requests are in progress; reading new requests waits until one finishes.
+    """
+    def __init__(self, workers=None, max_pending=64, timeout=None, cache=None):
+        workers = workers or multiprocessing.cpu_count()
+        # Not the default executor of the event loop: it has fewer threads than workers on large
+        # machines, and time spent waiting for a thread would count towards the request timeout
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers)
+        self.workers = [Worker(self.executor) for _ in range(workers)]
+        self.cache = cache  # solution_cache.SolutionCache for Sudoku requests, or None
+        self.idle = asyncio.Queue()
+        for worker in self.workers:
+            self.idle.put_nowait(worker)
+        self.pending = asyncio.Semaphore(max_pending)
+        self.timeout = timeout
+        self.tasks = {}
+
+    async def solve(self, request):
+        """
+        Solves one request on the next idle worker and returns the result with the request id.
+        Sudoku requests are answered from the cache when an equivalent puzzle was solved before.
+        """
+        error = request_error(request)
+        if error is not None:
+            return {"status": "ERROR", "error": error, "id": request.get("id") if isinstance(request, dict) else None}
+
+        lookup = None
+        if self.cache is not None and "sudoku" in request:
+            try:
+                lookup = self.cache.lookup(request["sudoku"].strip())
+            except ValueError as e:
+                return {"status": "ERROR", "error": str(e), "id": request.get("id")}
+            canonical, transformation, cached = lookup
+            if cached is not None:
+                result = {"status": "SAT" if cached else "UNSAT", "conflicts": 0, "runtime": 0.0, "cached": True}
+                if cached:
+                    result["solution"] = transformation.invert(cached)
+                return dict(result, id=request.get("id"))
+
+        result = await self.dispatch(request)
+        if lookup is not None and result["status"] in ("SAT", "UNSAT"):
+            self.cache.store(lookup[0], lookup[1], result.get("solution"))
+        return result
+
+    async def dispatch(self, request):
+        """
+        Sends a request to the next idle worker.
+        """
+        timeout = request.get("timeout", self.timeout)
+        worker = None
+        try:
+            worker = await self.idle.get()
+            result = await worker.solve(request, timeout)
+        except asyncio.TimeoutError:
+            result = {"status": "TIMEOUT"}
+        except asyncio.CancelledError:
+            result = {"status": "CANCELLED"}
+        except Exception as e:
+            result = {"status": "ERROR", "error": str(e)}
+        finally:
+            if worker is not None:
+                self.idle.put_nowait(worker)
+        return dict(result, id=request.get("id"))
+
+    async def serve_stream(self, reader, write):
+        """
+        Reads JSON-line requests from reader and passes every result to write as soon as it is ready.
+        """
+        running = set()
+
+        async def run(request, solve_task):
+            try:
+                try:
+                    result = await solve_task
+                except asyncio.CancelledError:
+                    # Cancelled before a worker picked it up
+                    result = {"status": "CANCELLED", "id": request.get("id")}
+                except Exception as e:
+                    result = {"status": "ERROR", "error": str(e), "id": request.get("id")}
+                write(result)
+            finally:
+                self.tasks.pop(request.get("id"), None)
+                self.pending.release()
+
+        while True:
+            await self.pending.acquire()  # Backpressure: wait for a free slot before reading on
+            line = await reader.readline()
+            if not line:
+                self.pending.release()
+                break
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                write({"status": "ERROR", "error": f"Invalid JSON: {e}"})
+                self.pending.release()
+                continue
+
+            error = request_error(request)
+            if error is not None:
+                request_id = request.get("id") if isinstance(request, dict) else None
+                write({"status": "ERROR", "error": error, "id": request_id if isinstance(request_id, (str, int, float)) else None})
+                self.pending.release()
+                continue
+
+            if "cancel" in request:
+                task = self.tasks.get(request["cancel"])
+                if task is not None:
+                    task.cancel()
+                self.pending.release()
+                continue
+
+            solve_task = asyncio.create_task(self.solve(request))
+            self.tasks[request.get("id")] = solve_task
+            task = asyncio.create_task(run(request, solve_task))
+            running.add(task)
+            task.add_done_callback(running.discard)
+
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    async def handle_connection(self, reader, writer):
+        def write(result):
+            writer.write((json.dumps(result) + "\n").encode())
+
+        try:
+            await self.serve_stream(reader, write)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def close(self):
+        for worker in self.workers:
+            worker.stop()
+        self.executor.shutdown(wait=False)
+
+
+async def serve_socket(service, host, port):
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Listening on {host}:{port}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+async def serve_stdin(service):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    def write(result):
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+    await service.serve_stream(reader, write)
+
+
+async def main(arguments):
+    cache = None
+    if not arguments.no_cache:
+        from solution_cache import SolutionCache
+        cache = SolutionCache(None, path=arguments.cache)
+    service = SolveService(arguments.workers, arguments.max_pending, arguments.timeout, cache)
+    try:
+        if arguments.stdin:
+            await serve_stdin(service)
+        else:
+            await serve_socket(service, arguments.host, arguments.port)
+    finally:
+        service.close()
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Asyncio solve service for DIMACS and Sudoku requests.")
+    parser.add_argument("--stdin", action="store_true", help="read requests from stdin instead of a socket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--max-pending", type=int, default=64, help="maximum number of requests in progress")
+    parser.add_argument("--timeout", type=float, default=None, help="default timeout per request in seconds")
+    parser.add_argument("--cache", default=None, help="SQLite file that keeps the Sudoku solution cache between runs")
+    parser.add_argument("--no-cache", action="store_true", help="solve every Sudoku request, also repeated ones")
+
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
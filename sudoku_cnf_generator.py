@@ -1,10 +1,66 @@
 import os
 import sys
+from functools import lru_cache
+
+from sudoku_rules import EMPTY, ENCODINGS, SYMBOLS, generated_rules, symbol_values, variable_base
+
+# Prebuilt rules files for the supported Sudoku sizes
+RULES_FILES = {
+    4: 'sudoku-rules-4x4.txt',
+    9: 'sudoku-rules-9x9.txt',
+    16: 'sudoku-rules-16x16.txt',
+}
+
+
+@lru_cache(maxsize=None)
+def load_rules(rules_filename):
+    """
+    Reads a rules file and returns its clause lines and the highest variable number used.
+    The result is cached, so the file is only parsed once per run.
+    """
+    rules_clauses = []
+    max_variable_number = 0
+    with open(rules_filename, 'r') as rules_file:
+        for line in rules_file:
+            line = line.strip()
+            if not line or line.startswith('c') or line.startswith('p'):
+                continue
+            rules_clauses.append(line)
+            # Extract variable numbers and update max_variable_number
+            variables_in_line = [int(x) for x in line.split() if x not in ('0', '')]
+            if variables_in_line:
+                max_variable_number = max(max_variable_number, max(map(abs, variables_in_line)))
+    return tuple(rules_clauses), max_variable_number
+
+
+def get_rules(N, encoding=None, redundant=True):
+    """
+    Returns the rules for an N x N Sudoku as clause lines and the highest variable number.
+    Without an encoding the prebuilt rules file is used when one exists for N,
+    otherwise the rules are generated (pairwise by default).
+    """
+    if encoding is None and redundant and N in RULES_FILES:
+        return load_rules(RULES_FILES[N])
+    return generated_rules(N, encoding or 'pairwise', redundant)
+
+
+@lru_cache(maxsize=None)
+def get_rule_sets(N, encoding=None, redundant=True):
+    """
+    Returns the rules of get_rules as a tuple of frozensets, the clause format used by DPLL.py
+    and CDCL.py. They are parsed once, and can be shared by the clause lists of many puzzles
+    because the solvers never change a clause.
+    """
+    rules_clauses, _ = get_rules(N, encoding, redundant)
+    return tuple(frozenset(int(x) for x in line.split()[:-1]) for line in rules_clauses)
+
 
 class SudokuCNFGenerator:
-    def __init__(self, sudoku_string, rules_filename):
+    def __init__(self, sudoku_string, rules_filename=None, encoding=None, redundant=True):
         self.sudoku_string = sudoku_string
         self.rules_filename = rules_filename
+        self.encoding = encoding
+        self.redundant = redundant
         self.clauses = []
         self.N = int(len(sudoku_string) ** 0.5)
         if self.N * self.N != len(sudoku_string):
@@ -16,28 +72,15 @@ class SudokuCNFGenerator:
         """
         Creates a mapping from characters in the Sudoku puzzle to numbers from 1 to N.
         """
-        mapping = {}
-        mapping['.'] = 0  # Empty cell
-        for i in range(1, self.N + 1):
-            if i <= 9:
-                mapping[str(i)] = i
-            else:
-                # For N > 9, use letters starting from 'A' for 10, 'B' for 11, etc.
-                mapping[chr(ord('A') + i - 10)] = i
-                mapping[chr(ord('a') + i - 10)] = i  # Also support lowercase letters
-        return mapping
+        return symbol_values(self.N)
 
     def compute_variable_number(self, r, c, v):
         """
         Computes the variable number based on the encoding rules.
-        For N=16, uses the special encoding formula.
-        For N=4 and N=9, uses standard encoding.
+        For N <= 9 this is the standard "rcv" encoding, for larger N a base N+1 encoding is used.
         """
-        if self.N == 16:
-            base = 17
-            return base**2 * r + base * c + v
-        else:
-            return int(f"{r}{c}{v}")
+        base = variable_base(self.N)
+        return base**2 * r + base * c + v
 
     def generate_cnf(self):
         """
@@ -47,7 +90,7 @@ class SudokuCNFGenerator:
         for i in range(self.N):
             for j in range(self.N):
                 value = self.sudoku_string[i * self.N + j]
-                if value != '.':
+                if value != EMPTY:
                     if value not in self.char_to_num:
                         print(f"Error: Invalid character '{value}' at position ({i + 1}, {j + 1})")
                         continue
@@ -64,20 +107,13 @@ class SudokuCNFGenerator:
     def save_cnf_with_rules(self, filename):
         """
         Saves the CNF clauses to a file in DIMACS format, including additional rules.
+        The rules are read from rules_filename if given, otherwise they are looked up with get_rules.
         """
-        # Initialize rules_clauses list
-        rules_clauses = []
-        with open(self.rules_filename, 'r') as rules_file:
-            for line in rules_file:
-                line = line.strip()
-                if not line or line.startswith('c') or line.startswith('p'):
-                    continue
-                # Add the line to rules_clauses
-                rules_clauses.append(line)
-                # Extract variable numbers and update self.max_variable_number
-                variables_in_line = [int(x) for x in line.split() if x not in ('0', '')]
-                if variables_in_line:
-                    self.max_variable_number = max(self.max_variable_number, max(map(abs, variables_in_line)))
+        if self.rules_filename is not None:
+            rules_clauses, rules_max_variable = load_rules(self.rules_filename)
+        else:
+            rules_clauses, rules_max_variable = get_rules(self.N, self.encoding, self.redundant)
+        self.max_variable_number = max(self.max_variable_number, rules_max_variable)
 
         total_clauses = len(self.clauses) + len(rules_clauses)
         variables = self.max_variable_number
@@ -94,6 +130,32 @@ class SudokuCNFGenerator:
             for clause in rules_clauses:
                 cnf_file.write(clause + "\n")
 
+def sudoku_to_clauses(sudoku_string, encoding=None, redundant=True):
+    """
+    Returns the clauses of a Sudoku (givens and rules) as a list of sets, the format used by DPLL.py and CDCL.py.
+    The rule clauses are the shared frozensets of get_rule_sets.
+    """
+    generator = SudokuCNFGenerator(sudoku_string, encoding=encoding, redundant=redundant)
+    generator.generate_cnf()
+    clauses = [{int(clause.split()[0])} for clause in generator.clauses]
+    clauses.extend(get_rule_sets(generator.N, encoding, redundant))
+    return clauses
+
+
+def decode_solution(pa, N):
+    """
+    Converts a satisfying assignment back to a Sudoku string of N*N characters.
+    """
+    base = variable_base(N)
+    solution = []
+    for r in range(1, N + 1):
+        for c in range(1, N + 1):
+            cell = base**2 * r + base * c
+            value = next((v for v in range(1, N + 1) if pa.get(cell + v)), None)
+            solution.append(SYMBOLS[value - 1] if value else EMPTY)
+    return ''.join(solution)
+
+
 def create_output_directory(filename):
     """
     Creates an output directory named after the source file (without extension).
@@ -103,9 +165,10 @@ def create_output_directory(filename):
         os.makedirs(output_dir)
     return output_dir
 
-def process_sudoku_file(filename, output_dir):
+def process_sudoku_file(filename, output_dir, encoding=None, redundant=True):
     """
     Reads a file containing Sudoku strings, generates CNF for each line, and saves them to individual files.
+    Any N x N Sudoku with a square box size is supported, see get_rules for how the rules are chosen.
     """
     try:
         with open(filename, 'r') as file:
@@ -118,19 +181,13 @@ def process_sudoku_file(filename, output_dir):
                     print(f"Error: Line {line_number} in the file does not contain a valid Sudoku puzzle. Expected a perfect square grid, but got length {len(sudoku_string)}.")
                     continue
 
-                # Select the appropriate rules file
-                if N == 4:
-                    rules_filename = 'sudoku-rules-4x4.txt'
-                elif N == 9:
-                    rules_filename = 'sudoku-rules-9x9.txt'
-                elif N == 16:
-                    rules_filename = 'sudoku-rules-16x16.txt'
-                else:
-                    print(f"Error: Unsupported Sudoku size N={N}. Only 4x4, 9x9, and 16x16 are supported.")
+                box_size = int(round(N ** 0.5))
+                if box_size * box_size != N:
+                    print(f"Error: Unsupported Sudoku size N={N}. The box size must be a whole number.")
                     continue
 
                 # Generate CNF for each Sudoku
-                generator = SudokuCNFGenerator(sudoku_string, rules_filename)
+                generator = SudokuCNFGenerator(sudoku_string, encoding=encoding, redundant=redundant)
                 generator.generate_cnf()
 
                 # Save each solution in a separate CNF file, with general rules appended
@@ -147,12 +204,17 @@ def process_sudoku_file(filename, output_dir):
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python sudoku_cnf_generator.py <input_filename>")
+        print("Usage: python sudoku_cnf_generator.py <input_filename> [encoding] [--minimal]")
         sys.exit(1)
 
-    input_filename = sys.argv[1]
+    arguments = [argument for argument in sys.argv[1:] if argument != '--minimal']
+    input_filename = arguments[0]
+    encoding = arguments[1] if len(arguments) > 1 else None
+    if encoding is not None and encoding not in ENCODINGS:
+        print(f"Error: Unknown encoding '{encoding}'. Choose from: {', '.join(ENCODINGS)}")
+        sys.exit(1)
 
     # Create the output directory named after the source file
     output_dir = create_output_directory(input_filename)
     # Process the Sudoku file and generate CNF files
-    process_sudoku_file(input_filename, output_dir)
\ No newline at end of file
+    process_sudoku_file(input_filename, output_dir, encoding, '--minimal' not in sys.argv)
\ No newline at end of file
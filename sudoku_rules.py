@@ -0,0 +1,191 @@
+"""""
+Usage: python sudoku_rules.py <box_size> [encoding] [--minimal]
+where:
+    box_size: size of one box, the Sudoku is N x N with N = box_size^2 (2, 3, 4, 5, 6, ...)
+    encoding: at-most-one encoding, one of: pairwise (default), sequential, commander
+    --minimal: leave out the redundant constraints
+
+Generates the Sudoku rules in DIMACS format for any box size and prints them.
+"""""
+import sys
+from functools import lru_cache
+
+ENCODINGS = ('pairwise', 'sequential', 'commander')
+
+# Group size used by the commander encoding
+COMMANDER_GROUP_SIZE = 3
+
+# Characters of the values 1 to 36 in Sudoku strings: 1-9, then A-Z for 10-35 and 0 for 36.
+# Letters may also be written in lowercase, an empty cell is written as '.'.
+SYMBOLS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ0'
+EMPTY = '.'
+
+
+def variable_base(N):
+    """
+    Returns the base of the variable encoding: variable = base^2 * row + base * column + value.
+    For N <= 9 this equals the decimal "rcv" encoding, for N = 16 it is the base 17 encoding.
+    """
+    return 10 if N <= 9 else N + 1
+
+
+def symbol_values(N):
+    """
+    Returns a mapping from the characters of an N x N Sudoku string to values (0 for an empty cell).
+    """
+    if N > len(SYMBOLS):
+        raise ValueError(f"Sudokus larger than {len(SYMBOLS)}x{len(SYMBOLS)} have no symbols")
+    mapping = {EMPTY: 0}
+    for value, symbol in enumerate(SYMBOLS[:N], start=1):
+        mapping[symbol] = value
+        mapping[symbol.lower()] = value
+    return mapping
+
+
+class AuxiliaryVariables:
+    """
+    Hands out fresh variable numbers for the auxiliary variables of the cardinality encodings.
+    """
+    def __init__(self, first):
+        self.next = first
+
+    def new(self):
+        variable = self.next
+        self.next += 1
+        return variable
+
+
+def at_least_one(literals):
+    return [list(literals)]
+
+
+def at_most_one_pairwise(literals, aux):
+    """
+    Naive encoding: one binary clause for every pair of literals, O(n^2) clauses.
+    """
+    return [[-literals[i], -literals[j]] for i in range(len(literals)) for j in range(i + 1, len(literals))]
+
+
+def at_most_one_sequential(literals, aux):
+    """
+    Sequential counter encoding (Sinz), 3n - 4 clauses and n - 1 auxiliary variables.
+    """
+    n = len(literals)
+    if n <= 1:
+        return []
+    counters = [aux.new() for _ in range(n - 1)]
+    clauses = [[-literals[0], counters[0]]]
+    for i in range(1, n - 1):
+        clauses.append([-literals[i], counters[i]])
+        clauses.append([-counters[i - 1], counters[i]])
+        clauses.append([-literals[i], -counters[i - 1]])
+    clauses.append([-literals[n - 1], -counters[n - 2]])
+    return clauses
+
+
+def at_most_one_commander(literals, aux):
+    """
+    Commander encoding (Klieber and Kwon): split the literals into small groups with one
+    commander variable each, and recursively apply at-most-one to the commanders.
+    """
+    if len(literals) <= COMMANDER_GROUP_SIZE + 1:
+        return at_most_one_pairwise(literals, aux)
+
+    clauses = []
+    commanders = []
+    for start in range(0, len(literals), COMMANDER_GROUP_SIZE):
+        group = literals[start:start + COMMANDER_GROUP_SIZE]
+        if len(group) == 1:
+            commanders.append(group[0])
+            continue
+        commander = aux.new()
+        commanders.append(commander)
+        clauses.extend(at_most_one_pairwise(group, aux))
+        # The commander is true if and only if one of its group is true
+        clauses.append([-commander] + group)
+        clauses.extend([-literal, commander] for literal in group)
+    clauses.extend(at_most_one_commander(commanders, aux))
+    return clauses
+
+
+AT_MOST_ONE = {
+    'pairwise': at_most_one_pairwise,
+    'sequential': at_most_one_sequential,
+    'commander': at_most_one_commander,
+}
+
+
+def generate_rules(box_size, encoding='pairwise', redundant=True):
+    """
+    Generates the rules of an N x N Sudoku with N = box_size^2.
+    The core rules are: every cell has at least one value and every value occurs at most once
+    in each row, column and box. The redundant rules add: every cell has at most one value and
+    every value occurs at least once in each row, column and box.
+    Returns the clauses as lists of literals and the highest variable number used.
+    """
+    if encoding not in AT_MOST_ONE:
+        raise ValueError(f"Unknown encoding '{encoding}'. Choose from: {', '.join(ENCODINGS)}")
+    at_most_one = AT_MOST_ONE[encoding]
+
+    N = box_size * box_size
+    base = variable_base(N)
+
+    def var(r, c, v):
+        return base * base * r + base * c + v
+
+    aux = AuxiliaryVariables(var(N, N, N) + 1)
+    values = range(1, N + 1)
+    clauses = []
+
+    # Cells
+    for r in values:
+        for c in values:
+            literals = [var(r, c, v) for v in values]
+            clauses.extend(at_least_one(literals))
+            if redundant:
+                clauses.extend(at_most_one(literals, aux))
+
+    # Rows, columns and boxes
+    units = []
+    for i in values:
+        units.append([(i, c) for c in values])
+        units.append([(r, i) for r in values])
+    for box_row in range(box_size):
+        for box_column in range(box_size):
+            units.append([(box_row * box_size + r + 1, box_column * box_size + c + 1)
+                          for r in range(box_size) for c in range(box_size)])
+
+    for unit in units:
+        for v in values:
+            literals = [var(r, c, v) for r, c in unit]
+            clauses.extend(at_most_one(literals, aux))
+            if redundant:
+                clauses.extend(at_least_one(literals))
+
+    return clauses, aux.next - 1
+
+
+@lru_cache(maxsize=None)
+def generated_rules(N, encoding='pairwise', redundant=True):
+    """
+    Returns the generated rules for an N x N Sudoku as DIMACS clause lines and the highest
+    variable number, the same format as sudoku_cnf_generator.load_rules.
+    """
+    box_size = int(round(N ** 0.5))
+    if box_size * box_size != N:
+        raise ValueError(f"Unsupported Sudoku size N={N}. N must be a perfect square.")
+    clauses, max_variable_number = generate_rules(box_size, encoding, redundant)
+    return tuple(" ".join(map(str, clause)) + " 0" for clause in clauses), max_variable_number
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python sudoku_rules.py <box_size> [encoding] [--minimal]")
+        sys.exit(1)
+
+    arguments = [argument for argument in sys.argv[1:] if argument != '--minimal']
+    encoding = arguments[1] if len(arguments) > 1 else 'pairwise'
+    rules, variables = generated_rules(int(arguments[0]) ** 2, encoding, '--minimal' not in sys.argv)
+
+    print(f"p cnf {variables} {len(rules)}")
+    print("\n".join(rules))